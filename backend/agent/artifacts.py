@@ -0,0 +1,64 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Root served by the /audio route
+AUDIO_DIR = os.getenv("AUDIO_DIR", "static/audio")
+# Finished episodes are named by content hash, so their URLs never change meaning
+HASHED_NAME = re.compile(r"^[0-9a-f]{20}\.[a-z0-9]+$")
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_immutable(filename: str) -> bool:
+    return bool(HASHED_NAME.match(os.path.basename(filename)))
+
+
+class JobWorkspace:
+    """Private scratch directory for one job's audio, plus publishing into the shared store.
+
+    Concurrent jobs never share a path: intermediate files live under
+    <AUDIO_DIR>/jobs/<job_id>/ and published artifacts are named by the
+    hash of their contents.
+    """
+
+    def __init__(self, job_id: str = None, root: str = AUDIO_DIR):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.root = root
+        self.path = os.path.join(root, "jobs", self.job_id)
+        os.makedirs(self.path, exist_ok=True)
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def url_for(self, name: str) -> str:
+        """Filename relative to AUDIO_DIR, as served under /audio/."""
+        return os.path.relpath(self.path_for(name), self.root).replace(os.sep, "/")
+
+    def publish(self, name: str) -> str:
+        """Move a finished file from the workspace to <hash><ext> in AUDIO_DIR and return that filename."""
+        source = self.path_for(name)
+        ext = os.path.splitext(name)[1].lower()
+        filename = f"{file_digest(source)[:20]}{ext}"
+        target = os.path.join(self.root, filename)
+        if os.path.exists(target):
+            # identical episode already published
+            os.remove(source)
+        else:
+            os.replace(source, target)
+        return filename
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
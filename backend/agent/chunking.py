@@ -0,0 +1,70 @@
+import re
+
+import numpy as np
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:—])\s+")
+
+
+def _pack(units: list, max_chars: int) -> list:
+    """Greedily join units with spaces into pieces of at most max_chars."""
+    pieces, current = [], ""
+    for unit in units:
+        if current and len(current) + 1 + len(unit) > max_chars:
+            pieces.append(current)
+            current = unit
+        else:
+            current = f"{current} {unit}" if current else unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _split_long(sentence: str, max_chars: int) -> list:
+    if len(sentence) <= max_chars:
+        return [sentence]
+    # fall back to clause boundaries, then to word boundaries
+    units = []
+    for clause in _CLAUSE_END.split(sentence):
+        if len(clause) <= max_chars:
+            units.append(clause)
+        else:
+            units.extend(_pack(clause.split(), max_chars))
+    return _pack(units, max_chars)
+
+
+def split_turn(text: str, max_chars: int) -> list:
+    """Split a speaker turn at sentence boundaries into pieces of at most max_chars.
+
+    Short turns come back unchanged as a single piece; a single word longer
+    than max_chars is left whole.
+    """
+    text = text.strip()
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+    units = []
+    for sentence in _SENTENCE_END.split(text):
+        units.extend(_split_long(sentence, max_chars))
+    return _pack(units, max_chars)
+
+
+def crossfade_join(pieces: list, fade: int) -> np.ndarray:
+    """Concatenate int16 pieces with a linear crossfade of `fade` samples at each join."""
+    pieces = [p for p in pieces if len(p)]
+    if not pieces:
+        return np.zeros(0, dtype=np.int16)
+    if len(pieces) == 1:
+        return pieces[0]
+
+    fades = [min(fade, len(a), len(b)) for a, b in zip(pieces, pieces[1:])]
+    out = np.empty(sum(len(p) for p in pieces) - sum(fades), dtype=pieces[0].dtype)
+    pos = 0
+    for i, piece in enumerate(pieces):
+        overlap = fades[i - 1] if i else 0
+        if overlap:
+            ramp = np.linspace(0.0, 1.0, overlap, endpoint=False, dtype=np.float32)
+            mixed = out[pos - overlap:pos] * (1.0 - ramp) + piece[:overlap] * ramp
+            out[pos - overlap:pos] = np.clip(np.rint(mixed), -32768, 32767)
+        out[pos:pos + len(piece) - overlap] = piece[overlap:]
+        pos += len(piece) - overlap
+    return out
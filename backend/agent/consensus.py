@@ -0,0 +1,91 @@
+import re
+from statistics import mean
+
+from .history import strip_reasoning
+
+_SCORE = re.compile(r"(\d{1,2}(?:\.\d+)?)\s*(?:/|out of)\s*10\b", re.IGNORECASE)
+_BARE_SCORE = re.compile(r"[:\-–—]\s*\**\s*(\d{1,2}(?:\.\d+)?)\b")
+
+
+def _valid(value: str):
+    score = float(value)
+    return score if 1 <= score <= 10 else None
+
+
+def parse_scores(reply: str, drafts=("Sarah", "John")) -> dict:
+    """Pull each draft's 1–10 rating out of a reviewer's reply.
+
+    Lines naming a draft are searched for "7/10", "7 out of 10" or "Sarah: 7";
+    if no line names the drafts, the first N x/10 ratings are taken in draft order.
+    """
+    text = strip_reasoning(reply).replace("*", "")
+    scores = {}
+    for line in text.splitlines():
+        for draft in drafts:
+            if draft in scores or draft.lower() not in line.lower():
+                continue
+            # only look at the text after the name so "Sarah 6/10, John 8/10" splits correctly
+            tail = line[line.lower().index(draft.lower()) + len(draft):]
+            others = [d for d in drafts if d != draft and d.lower() in tail.lower()]
+            if others:
+                tail = tail[:tail.lower().index(others[0].lower())]
+            match = _SCORE.search(tail) or _BARE_SCORE.search(tail)
+            if match and _valid(match.group(1)) is not None:
+                scores[draft] = _valid(match.group(1))
+
+    if not scores:
+        found = [_valid(m.group(1)) for m in _SCORE.finditer(text)]
+        found = [s for s in found if s is not None]
+        if len(found) >= len(drafts):
+            scores = dict(zip(drafts, found))
+    return scores
+
+
+class ConsensusTracker:
+    """Per-round reviewer scores and the rule for ending the debate early.
+
+    The debate may stop once at least min_rounds have run and, for every
+    draft, either the panel's ratings in the round lie within delta of each
+    other ("consensus") or the panel average moved by at most delta since
+    the previous round ("stable").
+    """
+
+    def __init__(self, drafts=("Sarah", "John"), delta: float = 1.0, min_rounds: int = 1, quorum: float = 0.5):
+        self.drafts = tuple(drafts)
+        self.delta = delta
+        self.min_rounds = min_rounds
+        self.quorum = quorum
+        self.rounds = {}
+
+    def record(self, round_no: int, agent: str, reply: str) -> dict:
+        scores = parse_scores(reply, self.drafts)
+        self.rounds.setdefault(round_no, {})[agent] = scores
+        return scores
+
+    def means(self, round_no: int) -> dict:
+        by_agent = self.rounds.get(round_no, {})
+        return {
+            draft: round(mean(s[draft] for s in by_agent.values() if draft in s), 2)
+            for draft in self.drafts
+            if any(draft in s for s in by_agent.values())
+        }
+
+    def stop_reason(self, round_no: int, panel_size: int):
+        """Return "consensus"/"stable" if the debate can end after round_no, else None."""
+        if round_no < self.min_rounds:
+            return None
+        by_agent = self.rounds.get(round_no, {})
+        complete = [s for s in by_agent.values() if all(d in s for d in self.drafts)]
+        if len(complete) < max(1, panel_size * self.quorum):
+            return None
+
+        spread = max(max(s[d] for s in complete) - min(s[d] for s in complete) for d in self.drafts)
+        if spread <= self.delta:
+            return "consensus"
+
+        previous = self.means(round_no - 1)
+        current = self.means(round_no)
+        if previous.keys() == current.keys() == set(self.drafts):
+            if all(abs(current[d] - previous[d]) <= self.delta for d in self.drafts):
+                return "stable"
+        return None
@@ -0,0 +1,107 @@
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from .artifacts import AUDIO_DIR
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Compressed variants written next to each published <hash>.wav
+FORMATS = {
+    "opus": {"ext": ".opus", "mimetype": "audio/ogg", "args": ["-c:a", "libopus", "-b:a", "48k", "-application", "voip"]},
+    "mp3": {"ext": ".mp3", "mimetype": "audio/mpeg", "args": ["-c:a", "libmp3lame", "-b:a", "96k"]},
+}
+MIMETYPES = {spec["mimetype"]: name for name, spec in FORMATS.items()}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enabled_formats() -> list:
+    names = os.getenv("ENCODE_FORMATS", "opus,mp3")
+    return [n.strip() for n in names.split(",") if n.strip() in FORMATS]
+
+
+def variant_name(wav_filename: str, fmt: str) -> str:
+    return os.path.splitext(wav_filename)[0] + FORMATS[fmt]["ext"]
+
+
+def encode(wav_filename: str, fmt: str, root: str = AUDIO_DIR) -> str:
+    """Encode a published WAV into fmt with ffmpeg and return the variant's filename."""
+    source = os.path.join(root, wav_filename)
+    name = variant_name(wav_filename, fmt)
+    target = os.path.join(root, name)
+    if os.path.exists(target):
+        return name
+
+    tmp = f"{target}.{threading.get_ident()}.tmp"
+    # ffmpeg streams the input through the encoder, so memory stays flat for long episodes
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", source,
+         *FORMATS[fmt]["args"], "-f", "ogg" if fmt == "opus" else fmt, tmp],
+        check=True,
+    )
+    os.replace(tmp, target)
+    return name
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("ENCODE_WORKERS", 1)), thread_name_prefix="encode"
+                )
+    return _executor
+
+
+def encode_in_background(wav_filename: str, on_ready=None):
+    """Queue compressed variants of a finished episode off the request's critical path.
+
+    on_ready(fmt, filename) is called from the encoder thread as each variant lands.
+    """
+    if shutil.which("ffmpeg") is None:
+        logger.warning("ffmpeg not found; serving %s as WAV only", wav_filename)
+        return []
+
+    def _run(fmt):
+        try:
+            name = encode(wav_filename, fmt)
+        except (OSError, subprocess.CalledProcessError):
+            logger.exception("Encoding %s to %s failed", wav_filename, fmt)
+            return None
+        if on_ready:
+            on_ready(fmt, name)
+        return name
+
+    return [_get_executor().submit(_run, fmt) for fmt in enabled_formats()]
+
+
+def negotiate(filename: str, requested: str = None, accept=None, root: str = AUDIO_DIR) -> tuple:
+    """Pick the file to serve for a WAV request: ?format= wins, then the Accept header.
+
+    Returns (served, fallback). fallback is True when a variant was asked for
+    but isn't encoded (yet) and the WAV itself is served instead.
+    """
+    if not filename.endswith(".wav"):
+        return filename, False
+
+    fmt = requested if requested in FORMATS else None
+    if fmt is None and accept is not None:
+        best = accept.best_match(["audio/wav", *MIMETYPES])
+        fmt = MIMETYPES.get(best)
+    if fmt is None:
+        return filename, False
+
+    name = variant_name(filename, fmt)
+    if os.path.exists(os.path.join(root, name)):
+        return name, False
+    return filename, True
@@ -1,10 +1,13 @@
 import os
-import re
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict
 from dotenv import load_dotenv
 from langchain_core.prompts import PromptTemplate
-from .mad import MAD
+from .jobs import track_stage
+from .mad import MAD, summarize_round
+from .perplexity import call_perplexity, stream_perplexity, SONAR_PRO
+from .streaming import DeltaPublisher, streaming_enabled, with_app_context
+from .transcript import TranscriptParser
 
 load_dotenv()
 from flask_sse import sse
@@ -16,6 +19,9 @@ john = """
 You are John, a young and energetic voice who brings fresh perspectives to the conversation. You enjoy presenting content in a lively, engaging way and aren’t afraid to explore controversial or provocative topics like crime, relationships, and social issues.
 """
 
+# Personas drafted in parallel; the debate compares the first two drafts
+DEFAULT_PERSONAS = [("Sarah", sarah), ("John", john)]
+
 def load_prompt_template() -> PromptTemplate:
     news_recitation_prompt = PromptTemplate(
     input_variables=["persona", "content", "duration", "n_speakers"],
@@ -53,52 +59,67 @@ def load_prompt_template() -> PromptTemplate:
 
     return news_recitation_prompt
 
-def call_perplexity(prompt: str) -> str:
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {"Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}"}
-    payload = {
-        "model": "sonar-pro",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        "search_domain_filter": [
-            "nasa.gov",
-            "wikipedia.org",
-            "space.com"
-        ],
-        "temperature" : 0.7
-    }
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"]
-
-# Summarization logic
-def summarize_contents(content: Dict[str, str], sse=None) -> Dict[str, str]:
+def _draft(prompt: str, name: str, sse=None, cancel=None) -> str:
+    if sse is None or not streaming_enabled():
+        return call_perplexity(prompt, cancel=cancel, **SONAR_PRO)
+    publisher = DeltaPublisher(sse, 'persona_delta', {"persona": name})
+    try:
+        return stream_perplexity(prompt, publisher, cancel=cancel, **SONAR_PRO)
+    finally:
+        publisher.flush()
+
+def draft_personas(content, personas=None, sse=None, max_workers=None, cancel=None) -> list:
+    """Draft one script per persona concurrently, publishing each as soon as it lands."""
+    personas = personas or DEFAULT_PERSONAS
     prompt_template = load_prompt_template()
-    initial_responses = []
-    for persona in [sarah, john]:
-        prompt = prompt_template.format(
-            persona=persona,
-            content=content,  # Trim if needed
-            duration=5,
-            n_speakers=2
-        )
-        
-        reply = call_perplexity(prompt)
-        initial_responses.append(reply)
-
-    # print(f"Total initial response: {initial_respones}")
-    # print(f"initial response 0: {initial_respones[0]}")
-    
-    # print(f"\n initial response 1: {initial_respones[1]}")
+    drafts = [None] * len(personas)
+    draft = with_app_context(_draft)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(personas)) as pool:
+        futures = {}
+        for i, (name, persona) in enumerate(personas):
+            prompt = prompt_template.format(
+                persona=persona,
+                content=content,  # Trim if needed
+                duration=5,
+                n_speakers=2
+            )
+            futures[pool.submit(draft, prompt, name, sse, cancel)] = (i, name)
+
+        for future in as_completed(futures):
+            i, name = futures[future]
+            drafts[i] = future.result()
+            if sse:
+                sse.publish({"persona": name, "response": drafts[i]}, type='persona')
+
+    return drafts
 
-    if sse:
-        sse.publish({"persona": "Sarah", "response": initial_responses[0]}, type='persona')
-        sse.publish({"persona": "John", "response": initial_responses[1]}, type='persona')
+# Summarization logic
+def summarize_contents(content: Dict[str, str], sse=None, personas=None, on_turn=None, cancel=None, job=None) -> Dict[str, str]:
+    # cancel: optional CancelToken, checked before and aborting every LLM call
+    # job: optional record (e.g. a Flight) the drafts, debate and final_script stages are tracked on
+    with track_stage(job, "drafts"):
+        initial_responses = draft_personas(content, personas, sse, cancel=cancel)
+    if len(initial_responses) < 2:
+        raise ValueError("summarize_contents needs at least two personas to debate")
 
     # Create a debate between the two personas
-    mad_agents = MAD(content, initial_responses[0], initial_responses[1])
+    mad_agents = MAD(
+        content, initial_responses[0], initial_responses[1],
+        parallel=os.getenv("MAD_PARALLEL_ROUNDS", "false").lower() in ("1", "true", "yes"),
+        max_workers=int(os.getenv("MAD_MAX_WORKERS", 5)),
+        history_tokens=int(os.getenv("MAD_HISTORY_TOKENS", 3000)),
+        # "llm" digests older rounds with a cheap model, otherwise scores/key points are extracted
+        summarizer=summarize_round if os.getenv("MAD_HISTORY_SUMMARIZER") == "llm" else None,
+        # set MAD_CONSENSUS_DELTA=off to always run every round
+        consensus_delta=None if os.getenv("MAD_CONSENSUS_DELTA") == "off" else float(os.getenv("MAD_CONSENSUS_DELTA", 1.0)),
+        min_rounds=int(os.getenv("MAD_MIN_ROUNDS", 1)),
+        stream=sse is not None and streaming_enabled(),
+        on_turn=on_turn,
+        sse=sse,
+        cancel=cancel,
+        job=job
+    )
     
     if sse:
         sse.publish({"status": "mad_started"}, type='status')
@@ -109,18 +130,8 @@ def summarize_contents(content: Dict[str, str], sse=None) -> Dict[str, str]:
 # Transcript parsing
 def parse_transcript(transcript: str):
     # Match speaker tags like [S1] or [S2]: followed by content
-    pattern = r'\[(S\d+)\]:?\s*(.*?)((?=\[S\d+\])|$)'
-    matches = re.findall(pattern, transcript, re.DOTALL)
-    
-    cleaned = []
-    for speaker, content, _ in matches:
-        # Remove asterisks and any [0-9] tags inside content
-        content = content.strip()
-        content = content.replace("*", "")
-        content = re.sub(r'\[\d+\]', '', content)  # remove tags like [1], [23], etc.
-        cleaned.append((speaker, content.strip()))
-    
-    return cleaned
+    parser = TranscriptParser()
+    return parser.feed(transcript) + parser.close()
 
 
 # def get_conversations(content):
@@ -0,0 +1,110 @@
+import re
+
+# Reasoning models wrap their chain of thought in <think> blocks; reviewers never need it
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL)
+_SCORE_LINE = re.compile(r"\b\d{1,2}(?:\.\d)?\s*(?:/|out of)\s*10\b|\b(?:score|rating|rate)\b", re.IGNORECASE)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for budgeting prompts."""
+    return len(text) // 4 + 1
+
+
+def strip_reasoning(text: str) -> str:
+    return _THINK.sub("", text).strip()
+
+
+def _clip(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 1)].rstrip() + "…"
+
+
+def key_points(response: str, max_points: int = 3, max_chars: int = 200) -> list:
+    """Pick a reviewer's score lines first, then bullet points, then leading sentences."""
+    lines = [ln.replace("*", "").replace("#", "").strip() for ln in response.splitlines()]
+    lines = [ln for ln in lines if ln]
+
+    scores = [ln for ln in lines if _SCORE_LINE.search(ln)]
+    bullets = [ln for ln in lines if _BULLET.match(ln) and ln not in scores]
+    prose = [ln for ln in lines if ln not in scores and ln not in bullets]
+    bullets = [_BULLET.sub("", ln) for ln in bullets]
+    sentences = _SENTENCE.split(" ".join(prose))
+
+    points = []
+    for candidate in scores + bullets + sentences:
+        if len(points) >= max_points:
+            break
+        if candidate and candidate not in points:
+            points.append(_clip(candidate, max_chars))
+    return points
+
+
+class DebateHistory:
+    """Debate transcript kept within a token budget.
+
+    The most recently closed round (and whatever has been said in the
+    current one) stays verbatim; older rounds are folded into a running
+    digest, either by a summarizer callable or by extracting each
+    reviewer's scores and key points. The summarizer is called as
+    summarizer(text, cancel=cancel) so an LLM digest can be aborted.
+    """
+
+    def __init__(self, token_budget: int = 3000, summarizer=None, digest_share: float = 0.35, cancel=None):
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self.cancel = cancel
+        self.digest_budget = int(token_budget * digest_share)
+        self.digest = []
+        self._rounds = {}
+
+    def add(self, round_no: int, agent: str, response: str):
+        self._rounds.setdefault(round_no, []).append((agent, strip_reasoning(response)))
+
+    def close_round(self, round_no: int):
+        """Fold every round before round_no into the digest."""
+        for old in sorted(r for r in self._rounds if r < round_no):
+            self.digest.append(self._digest_round(old, self._rounds.pop(old)))
+        self._fit_digest()
+
+    def entries(self, round_no: int) -> list:
+        return list(self._rounds.get(round_no, []))
+
+    def _digest_round(self, round_no: int, entries: list) -> str:
+        if self.summarizer:
+            transcript = "\n".join(f"{agent}: {response}" for agent, response in entries)
+            return f"Round {round_no}: {self.summarizer(transcript, cancel=self.cancel).strip()}"
+
+        lines = [f"Round {round_no}:"]
+        for agent, response in entries:
+            lines.append(f"- {agent}: " + " | ".join(key_points(response)))
+        return "\n".join(lines)
+
+    def _fit_digest(self):
+        digest = "\n".join(self.digest)
+        if estimate_tokens(digest) <= self.digest_budget:
+            return
+        if self.summarizer:
+            self.digest = [f"Earlier rounds: {self.summarizer(digest, cancel=self.cancel).strip()}"]
+            return
+        while len(self.digest) > 1 and estimate_tokens("\n".join(self.digest)) > self.digest_budget:
+            self.digest.pop(0)
+
+    def render(self) -> str:
+        """History text for the next prompt, never much larger than the token budget."""
+        digest = "\n".join(self.digest)
+        entries = [(agent, response) for r in sorted(self._rounds) for agent, response in self._rounds[r]]
+        if not entries:
+            return digest
+
+        remaining = max(0, self.token_budget - estimate_tokens(digest))
+        per_entry_chars = remaining * 4 // len(entries)
+        verbatim = "\n".join(
+            f"Agent : {agent}, response : {_clip(response, per_entry_chars)}"
+            for agent, response in entries
+        )
+        if digest:
+            return f"[Summary of earlier rounds]\n{digest}\n\n[Recent discussion]\n{verbatim}"
+        return verbatim
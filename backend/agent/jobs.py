@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ACTIVE = ("queued", "running")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+def _current_stage(record: dict):
+    """The most recently started stage that is still open, or None."""
+    open_stages = [(t["started_at"] or 0, i, name)
+                   for i, (name, t) in enumerate(record["stages"].items()) if t["ended_at"] is None]
+    return max(open_stages)[2] if open_stages else None
+
+
+class BaseJobStore:
+    """Job records with stage timings, artifacts and errors; backends implement _load/_save/__len__.
+
+    Records are plain JSON-serializable dicts. Read-modify-write goes
+    through one lock per process, and every save refreshes the entry's
+    expiry: active_ttl while the job is queued or running (a safety net
+    for jobs lost in a crash), ttl once it has finished.
+    """
+
+    def __init__(self, ttl: float, active_ttl: float):
+        self.ttl = ttl
+        self.active_ttl = active_ttl
+        self._lock = threading.RLock()
+
+    def create(self, job_id: str, **fields) -> dict:
+        now = time.time()
+        record = {
+            "id": job_id,
+            "state": "queued",
+            "stage": None,
+            "stages": {},
+            "artifacts": {},
+            "error": None,
+            "cancel_requested": False,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+            **fields,
+        }
+        with self._lock:
+            self._put(record)
+        return record
+
+    def get(self, job_id: str):
+        return self._load(job_id)
+
+    def _put(self, record: dict):
+        record["updated_at"] = time.time()
+        self._save(record["id"], record, self.active_ttl if record["state"] in ACTIVE else self.ttl)
+
+    def update(self, job_id: str, fn):
+        """Apply fn(record) under the store lock and save; returns the record, or None if unknown."""
+        with self._lock:
+            record = self._load(job_id)
+            if record is None:
+                return None
+            fn(record)
+            self._put(record)
+            return record
+
+    def set_state(self, job_id: str, state: str):
+        self.update(job_id, lambda r: r.update(state=state))
+
+    def start_stage(self, job_id: str, stage: str):
+        def apply(record):
+            record["stage"] = stage
+            record["stages"][stage] = {"started_at": time.time(), "ended_at": None}
+        self.update(job_id, apply)
+
+    def end_stage(self, job_id: str, stage: str):
+        def apply(record):
+            record["stages"].setdefault(stage, {"started_at": None})["ended_at"] = time.time()
+            # stages overlap (pipelined TTS runs alongside the script), so fall back to one still open
+            record["stage"] = _current_stage(record)
+        self.update(job_id, apply)
+
+    def add_artifact(self, job_id: str, name: str, url: str):
+        self.update(job_id, lambda r: r["artifacts"].__setitem__(name, url))
+
+    def finish(self, job_id: str, state: str, error: str = None):
+        def apply(record):
+            if record["state"] in FINISHED:
+                return  # the first outcome wins, e.g. a cancel racing a failure
+            now = time.time()
+            record.update(state=state, stage=None, error=error, finished_at=now)
+            for timing in record["stages"].values():
+                if timing["ended_at"] is None:
+                    timing["ended_at"] = now
+        self.update(job_id, apply)
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Flag a job for cancellation; False when it is unknown."""
+        return self.update(job_id, lambda r: r.update(cancel_requested=True)) is not None
+
+    def is_cancelled(self, job_id: str) -> bool:
+        record = self._load(job_id)
+        return record is None or record["cancel_requested"]
+
+    def stats(self) -> dict:
+        return {"backend": type(self).__name__, "jobs": len(self)}
+
+
+class MemoryJobStore(BaseJobStore):
+    """In-process store; expired records are swept on write."""
+
+    def __init__(self, ttl: float, active_ttl: float):
+        super().__init__(ttl, active_ttl)
+        self._records = {}
+        self._next_sweep = 0.0
+
+    def _load(self, job_id):
+        entry = self._records.get(job_id)
+        if entry is None or entry[1] < time.time():
+            return None
+        # hand out a copy so callers can't mutate the stored record outside the lock
+        return json.loads(entry[0])
+
+    def _save(self, job_id, record, ttl):
+        now = time.time()
+        self._records[job_id] = (json.dumps(record), now + ttl)
+        if now >= self._next_sweep:
+            self._next_sweep = now + 60
+            for key in [k for k, (_, expires_at) in self._records.items() if expires_at < now]:
+                del self._records[key]
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SQLiteJobStore(BaseJobStore):
+    """On-disk store that survives restarts."""
+
+    def __init__(self, path: str, ttl: float, active_ttl: float):
+        super().__init__(ttl, active_ttl)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, record TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at)")
+        self._db.commit()
+
+    def _load(self, job_id):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT record FROM jobs WHERE id = ? AND expires_at >= ?", (job_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save(self, job_id, record, ttl):
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (id, record, expires_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(record), now + ttl)
+            )
+            self._db.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+            self._db.commit()
+
+    def __len__(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+class RedisJobStore(BaseJobStore):
+    """Store shared by every worker; Redis expires the records."""
+
+    def __init__(self, url: str, ttl: float, active_ttl: float, prefix: str = "ellipsis:jobs"):
+        super().__init__(ttl, active_ttl)
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _load(self, job_id):
+        value = self._redis.get(f"{self.prefix}:{job_id}")
+        return json.loads(value) if value else None
+
+    def _save(self, job_id, record, ttl):
+        self._redis.set(f"{self.prefix}:{job_id}", json.dumps(record), ex=int(ttl))
+
+    def __len__(self):
+        return sum(1 for _ in self._redis.scan_iter(f"{self.prefix}:*", count=500))
+
+
+@contextmanager
+def track_stage(job, stage: str):
+    """Record a stage on job (anything with start_stage/end_stage, e.g. a Flight) around a block; job may be None."""
+    if job is None:
+        yield
+        return
+    job.start_stage(stage)
+    try:
+        yield
+    finally:
+        job.end_stage(stage)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> BaseJobStore:
+    """Return the process-wide job store.
+
+    JOB_STORE picks memory (default), sqlite or redis; JOB_TTL (default 6 h)
+    expires finished jobs and JOB_ACTIVE_TTL (default 24 h) abandoned ones,
+    JOB_STORE_PATH / JOB_STORE_REDIS_URL locate it.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.getenv("JOB_STORE", "memory").lower()
+                ttl = float(os.getenv("JOB_TTL", 6 * 3600))
+                active_ttl = float(os.getenv("JOB_ACTIVE_TTL", 24 * 3600))
+                if backend == "sqlite":
+                    _store = SQLiteJobStore(os.getenv("JOB_STORE_PATH", "cache/jobs.sqlite3"), ttl, active_ttl)
+                elif backend == "redis":
+                    url = os.getenv("JOB_STORE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6380")
+                    _store = RedisJobStore(url, ttl, active_ttl)
+                else:
+                    _store = MemoryJobStore(ttl, active_ttl)
+    return _store
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(payload: dict) -> str:
+    """Content address of a completion request (model, messages, temperature, filters...)."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class BaseCache:
+    """Common hit/miss accounting; backends implement _get/_set/__len__."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str):
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str, ttl: float = None):
+        self._set(key, value, ttl or self.ttl)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self),
+        }
+
+
+class MemoryCache(BaseCache):
+    """In-process LRU with per-entry expiry."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        super().__init__(ttl, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """On-disk cache that survives restarts; least recently used rows are evicted first."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        super().__init__(ttl, max_entries)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed_at)")
+        self._db.commit()
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM completions WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._db.execute("DELETE FROM completions WHERE expires_at < ?", (now,))
+            self._db.execute(
+                "DELETE FROM completions WHERE key IN ("
+                " SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+
+class RedisCache(BaseCache):
+    """Cache shared by every worker; Redis expires entries, a sorted-set index caps the count.
+
+    If Redis is unreachable, lookups count as misses and writes are skipped.
+    """
+
+    def __init__(self, url: str, ttl: float, max_entries: int, prefix: str = "ellipsis:llm_cache"):
+        super().__init__(ttl, max_entries)
+        import redis
+
+        self._errors = (redis.RedisError,)
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._index = f"{prefix}:index"
+
+    def _get(self, key):
+        try:
+            value = self._redis.get(f"{self.prefix}:{key}")
+            if value is None:
+                return None
+            self._redis.zadd(self._index, {key: time.time()})
+        except self._errors:
+            logger.warning("LLM cache Redis unavailable, treating lookup as a miss", exc_info=True)
+            return None
+        return value.decode("utf-8")
+
+    def _set(self, key, value, ttl):
+        try:
+            pipe = self._redis.pipeline()
+            pipe.set(f"{self.prefix}:{key}", value, ex=int(ttl))
+            pipe.zadd(self._index, {key: time.time()})
+            pipe.zcard(self._index)
+            count = pipe.execute()[-1]
+            if count > self.max_entries:
+                evicted = self._redis.zpopmin(self._index, count - self.max_entries)
+                if evicted:
+                    self._redis.delete(*(f"{self.prefix}:{k.decode('utf-8')}" for k, _ in evicted))
+        except self._errors:
+            logger.warning("LLM cache Redis unavailable, reply not cached", exc_info=True)
+
+    def __len__(self):
+        try:
+            return self._redis.zcard(self._index)
+        except self._errors:
+            return 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide completion cache, or None when LLM_CACHE_BACKEND=none.
+
+    LLM_CACHE_BACKEND picks memory (default), sqlite or redis; LLM_CACHE_TTL and
+    LLM_CACHE_MAX_ENTRIES bound it, LLM_CACHE_PATH / LLM_CACHE_REDIS_URL locate it.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+                ttl = float(os.getenv("LLM_CACHE_TTL", 24 * 3600))
+                max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+                if backend == "none":
+                    return None
+                if backend == "sqlite":
+                    path = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+                    _cache = SQLiteCache(path, ttl, max_entries)
+                elif backend == "redis":
+                    url = os.getenv("LLM_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6380")
+                    _cache = RedisCache(url, ttl, max_entries)
+                else:
+                    _cache = MemoryCache(ttl, max_entries)
+    return _cache
@@ -1,11 +1,14 @@
-import os
-import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
+from .perplexity import call_perplexity, stream_perplexity, SONAR_REASONING, SONAR_SUMMARY
+from .streaming import DeltaPublisher
+from .transcript import TranscriptParser
+from .history import DebateHistory
+from .jobs import track_stage
+from .consensus import ConsensusTracker
 
-load_dotenv()
-from flask_sse import sse
 load_dotenv()
 
 # Role prompts
@@ -40,30 +43,42 @@ You are Scientist, a critical thinker with a strong foundation in evidence, logi
 Please share which script communicates ideas more accurately and clearly. Offer suggestions to improve reasoning, factual grounding, or clarity of explanation.
 """
 
-# Perplexity call
-def call_perplexity(prompt: str) -> str:
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {"Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}"}
-    payload = {
-        "model": "sonar-reasoning-pro",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        "search": False,
-        "temperature": 0.2
-    }
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"]
+def summarize_round(transcript: str, cancel=None) -> str:
+    """Cheap LLM digest of a finished review round, used to compress older history."""
+    prompt = (
+        "Summarize this podcast review discussion in at most 120 words. "
+        "Keep every reviewer's name, the 1-10 scores they gave each script, "
+        "and their main suggestions. Output only the summary.\n\n" + transcript
+    )
+    return call_perplexity(prompt, cancel=cancel, **SONAR_SUMMARY)
 
 # MAD class
 class MAD:
-    def __init__(self, source_text, agent1: str, agent2: str, rounds=3):
+    def __init__(self, source_text, agent1: str, agent2: str, rounds=3, parallel=False, max_workers=None,
+                 history_tokens=3000, summarizer=None, consensus_delta=None, min_rounds=1, stream=False,
+                 on_turn=None, sse=None, cancel=None, job=None):
         self.rounds = rounds
+        # optional job record (e.g. a Flight) the debate and final_script stages are tracked on
+        self.job = job
+        # CancelToken checked before every LLM call; cancelling it also aborts calls in flight
+        self.cancel = cancel
+        # progress events go here (flask_sse's sse or a per-job channel); None publishes nothing
+        self.sse = sse
+        # stream the final script to SSE as 'script_delta' events while it is written
+        self.stream = stream
+        # called with each (speaker, line) of the final script as soon as the turn is complete
+        self.on_turn = on_turn
+        # early stop once reviewer scores converge; None always runs every round
+        self.consensus_delta = consensus_delta
+        self.consensus = ConsensusTracker(("Sarah", "John"), consensus_delta or 0.0, min_rounds)
+        self.stop_reason = None
+        # parallel rounds: every reviewer sees only the earlier rounds and runs concurrently
+        self.parallel = parallel
+        self.max_workers = max_workers
         self.agent1_text = agent1
         self.agent2_text = agent2
-        self.history = []
+        # latest round verbatim, older rounds compressed into a digest
+        self.history = DebateHistory(history_tokens, summarizer, cancel=cancel)
         self.source_text = source_text
         self.agents = {
             'general_public': general_public_prompt,
@@ -108,25 +123,75 @@ class MAD:
             """
             )
 
+    def _review(self, round_no: int, name: str, agent_text: str, history) -> str:
+        prompt = self.template.format(
+            source_text= self.source_text,
+            compared_text_one= self.agent1_text,
+            compared_text_two = self.agent2_text,
+            chat_history = history,
+            role_description = agent_text,
+            agent_name = name)  # Trim long input
+        response = call_perplexity(prompt, cancel=self.cancel, **SONAR_REASONING)
+        print(f"Round {round_no} - {name}: {response}")
+        return response
+
+    def _serial_round(self, round_no: int):
+        for name, agent_text in self.agents.items():
+            if self.sse:
+                self.sse.publish({"mad_agent": name, "round": round_no}, type='mad')
+            response = self._review(round_no, name, agent_text, self.history.render())
+            self.history.add(round_no, name, response)
+
+    def _parallel_round(self, round_no: int, pool: ThreadPoolExecutor):
+        snapshot = self.history.render()
+        futures = {}
+        for name, agent_text in self.agents.items():
+            # published here: worker threads have no app context for sse
+            if self.sse:
+                self.sse.publish({"mad_agent": name, "round": round_no}, type='mad')
+            futures[name] = pool.submit(self._review, round_no, name, agent_text, snapshot)
+
+        # append in panel order, whatever order the replies arrived in
+        for name, future in futures.items():
+            self.history.add(round_no, name, future.result())
+
+    def _finish_round(self, round_no: int):
+        """Score the round, publish the scores and return a stop reason if the panel has converged."""
+        scores = {
+            name: self.consensus.record(round_no, name, response)
+            for name, response in self.history.entries(round_no)
+        }
+        if self.sse:
+            self.sse.publish({"round": round_no, "scores": scores, "mean": self.consensus.means(round_no)}, type='mad_scores')
+        self.history.close_round(round_no)
+
+        if self.consensus_delta is None:
+            return None
+        return self.consensus.stop_reason(round_no, len(self.agents))
+
     def debate(self) -> str:
-        for i in range(self.rounds):
-            for name, agent_text in self.agents.items():
-                prompt = self.template.format(
-                    source_text= self.source_text,
-                    compared_text_one= self.agent1_text,
-                    compared_text_two = self.agent2_text,
-                    chat_history = self.history,
-                    role_description = agent_text,
-                    agent_name = name)  # Trim long input
-                if sse:
-                    sse.publish({"mad_agent": name, "round": i+1}, type='mad')
-                time.sleep(10)
-                
-                response = call_perplexity(prompt)
-                print(f"Round {i+1} - {name}: {response}")
-                self.history.append(f'Agent : {name}, response : {response}')
-                
-        return self._get_final_response()
+        self.stop_reason = "max_rounds"
+        rounds_run = 0
+        pool = ThreadPoolExecutor(max_workers=self.max_workers or len(self.agents)) if self.parallel else nullcontext()
+        with track_stage(self.job, "debate"), pool:
+            for i in range(self.rounds):
+                if self.cancel:
+                    self.cancel.raise_if_cancelled()
+                if self.parallel:
+                    self._parallel_round(i+1, pool)
+                else:
+                    self._serial_round(i+1)
+                rounds_run = i+1
+
+                reason = self._finish_round(i+1)
+                if reason:
+                    self.stop_reason = reason
+                    break
+
+        if self.sse:
+            self.sse.publish({"stop_reason": self.stop_reason, "rounds": rounds_run}, type='mad_stop')
+        with track_stage(self.job, "final_script"):
+            return self._get_final_response()
 
     def _get_final_response(self) -> str:
         synthesis_template = PromptTemplate(
@@ -167,9 +232,31 @@ class MAD:
             source_text=self.source_text,
             compared_text_one=self.agent1_text,
             compared_text_two=self.agent2_text,
-            all_reviews_summary="\n".join(self.history)
+            all_reviews_summary=self.history.render()
         )
-        return call_perplexity(prompt)
+        publish = self.stream and self.sse
+        if not publish and self.on_turn is None:
+            return call_perplexity(prompt, cancel=self.cancel, **SONAR_REASONING)
+
+        publisher = DeltaPublisher(self.sse, 'script_delta') if publish else None
+        parser = TranscriptParser() if self.on_turn else None
+
+        def on_delta(delta: str):
+            if publisher:
+                publisher(delta)
+            if parser:
+                for turn in parser.feed(delta):
+                    self.on_turn(turn)
+
+        try:
+            script = stream_perplexity(prompt, on_delta, cancel=self.cancel, **SONAR_REASONING)
+        finally:
+            if publisher:
+                publisher.flush()
+        if parser:
+            for turn in parser.close():
+                self.on_turn(turn)
+        return script
 
 
 
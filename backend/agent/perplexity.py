@@ -0,0 +1,261 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+
+import httpx
+from dotenv import load_dotenv
+from .ratelimit import get_limiter
+from .llm_cache import cache_key, get_cache
+from .pipeline import PipelineCancelled
+
+load_dotenv()
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 on the pooled client)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+API_URL = "https://api.perplexity.ai/chat/completions"
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+# Status codes worth another attempt; anything else is raised straight away
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Request presets used by the pipeline stages
+SONAR_PRO = {
+    "model": "sonar-pro",
+    "temperature": 0.7,
+    "search_domain_filter": [
+        "nasa.gov",
+        "wikipedia.org",
+        "space.com"
+    ],
+}
+SONAR_REASONING = {
+    "model": "sonar-reasoning-pro",
+    "temperature": 0.2,
+    "search": False,
+}
+SONAR_SUMMARY = {
+    "model": "sonar",
+    "temperature": 0.0,
+    "search": False,
+}
+
+
+def _retry_after(value) -> float | None:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PerplexityClient:
+    """Chat-completions client sharing one keep-alive connection pool.
+
+    Every call waits on the shared rate limiter and gets a timeout, and
+    429/5xx responses or dropped connections are retried with jittered
+    exponential backoff (or the server's Retry-After, when it sends one).
+    Replies are cached by a hash of the full request payload.
+    """
+
+    def __init__(self, api_key=None, timeout=None, connect_timeout=None,
+                 max_retries=None, backoff_base=None, backoff_cap=None,
+                 pool_size=None, limiter=None, response_cache=None):
+        self.api_key = api_key or os.getenv("PERPLEXITY_API_KEY")
+        self.timeout = float(timeout or os.getenv("PERPLEXITY_TIMEOUT", 120))
+        self.connect_timeout = float(connect_timeout or os.getenv("PERPLEXITY_CONNECT_TIMEOUT", 10))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("PERPLEXITY_MAX_RETRIES", 4))
+        self.backoff_base = float(backoff_base or os.getenv("PERPLEXITY_BACKOFF_BASE", 1.0))
+        self.backoff_cap = float(backoff_cap or os.getenv("PERPLEXITY_BACKOFF_CAP", 30.0))
+        pool_size = int(pool_size or os.getenv("PERPLEXITY_POOL_SIZE", 20))
+        self.limiter = limiter or get_limiter()
+        self.cache = response_cache if response_cache is not None else get_cache()
+
+        self._http = httpx.Client(
+            http2=_HTTP2,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def _timeout(self, timeout=None) -> httpx.Timeout:
+        return httpx.Timeout(timeout or self.timeout, connect=self.connect_timeout)
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        """Full-jitter exponential backoff, overridden by the server's Retry-After."""
+        hinted = _retry_after(retry_after)
+        if hinted is not None:
+            return min(hinted, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _payload(self, prompt: str, model: str, temperature: float, system: str, extra: dict) -> dict:
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature,
+        }
+        payload.update(extra)
+        return payload
+
+    def _sleep(self, seconds: float, cancel=None):
+        if cancel is None:
+            time.sleep(seconds)
+        elif cancel.wait(seconds):
+            raise PipelineCancelled()
+
+    def _send(self, payload: dict, timeout=None, stream: bool = False, cancel=None) -> httpx.Response:
+        """POST with retries; a streamed response is returned unread and must be closed by the caller."""
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            self.limiter.acquire(cancel)
+            try:
+                request = self._http.build_request("POST", API_URL, json=payload, timeout=self._timeout(timeout))
+                response = self._http.send(request, stream=stream)
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                self._sleep(self._backoff(attempt), cancel)
+                continue
+
+            retry_after = response.headers.get("Retry-After")
+            if response.status_code == 429:
+                self.limiter.on_throttle(_retry_after(retry_after))
+            elif response.status_code in RETRY_STATUSES and retry_after:
+                self.limiter.pause(_retry_after(retry_after))
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                response.close()
+                self._sleep(self._backoff(attempt, retry_after), cancel)
+                continue
+
+            if response.is_error:
+                response.close()
+                response.raise_for_status()
+            self.limiter.on_success()
+            return response
+
+    def _cached(self, payload: dict, use_cache: bool):
+        # an empty cache is falsy (it has a __len__), so compare against None
+        if self.cache is None:
+            return None, None
+        key = cache_key(payload)
+        return key, self.cache.get(key) if use_cache else None
+
+    def chat(self, prompt: str, model: str = "sonar-pro", temperature: float = 0.7,
+             system: str = SYSTEM_PROMPT, timeout=None, use_cache: bool = True,
+             cache_ttl: float = None, cancel=None, **extra) -> str:
+        """Send a single-turn prompt and return the assistant's reply text.
+
+        use_cache=False skips the cache lookup (the fresh reply is still stored).
+        With a cancel token the reply is streamed, so a cancel can drop the
+        connection mid-generation instead of waiting for the full reply.
+        """
+        if cancel is not None:
+            return self.stream_chat(prompt, lambda delta: None, model, temperature, system,
+                                    timeout, use_cache, cache_ttl, cancel=cancel, **extra)
+        payload = self._payload(prompt, model, temperature, system, extra)
+        key, cached = self._cached(payload, use_cache)
+        if cached is not None:
+            return cached
+
+        response = self._send(payload, timeout)
+        content = response.json()["choices"][0]["message"]["content"]
+        if key is not None:
+            self.cache.set(key, content, cache_ttl)
+        return content
+
+    def stream_chat(self, prompt: str, on_delta, model: str = "sonar-pro", temperature: float = 0.7,
+                    system: str = SYSTEM_PROMPT, timeout=None, use_cache: bool = True,
+                    cache_ttl: float = None, cancel=None, **extra) -> str:
+        """Like chat(), but with stream=true; on_delta(text) is called for every new piece of the reply.
+
+        Cancelling the optional cancel token closes the stream and raises PipelineCancelled.
+        """
+        payload = self._payload(prompt, model, temperature, system, extra)
+        key, cached = self._cached(payload, use_cache)
+        if cached is not None:
+            on_delta(cached)
+            return cached
+
+        parts = []
+        response = self._send({**payload, "stream": True}, timeout, stream=True, cancel=cancel)
+        try:
+            with cancel.on_cancel(response.close) if cancel else nullcontext():
+                for delta in _iter_deltas(response):
+                    parts.append(delta)
+                    on_delta(delta)
+        except Exception:
+            # closing the stream from the cancelling thread surfaces as a read error here
+            if cancel and cancel.is_cancelled():
+                raise PipelineCancelled() from None
+            raise
+        finally:
+            response.close()
+        if cancel:
+            # a truncated reply must not end up in the cache
+            cancel.raise_if_cancelled()
+
+        content = "".join(parts)
+        if key is not None:
+            self.cache.set(key, content, cache_ttl)
+        return content
+
+    def close(self):
+        self._http.close()
+
+
+def _iter_deltas(response: httpx.Response):
+    """Yield the new text carried by each server-sent event of a streamed completion."""
+    received = 0
+    for line in response.iter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        choice = json.loads(data)["choices"][0]
+        delta = (choice.get("delta") or {}).get("content")
+        if delta is None:
+            # some chunks only carry the cumulative message so far
+            message = (choice.get("message") or {}).get("content") or ""
+            delta = message[received:]
+        if delta:
+            received += len(delta)
+            yield delta
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PerplexityClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PerplexityClient()
+    return _client
+
+
+def call_perplexity(prompt: str, **options) -> str:
+    return get_client().chat(prompt, **options)
+
+
+def stream_perplexity(prompt: str, on_delta, **options) -> str:
+    return get_client().stream_chat(prompt, on_delta, **options)
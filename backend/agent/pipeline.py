@@ -0,0 +1,150 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+_END = object()
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a pipeline stage once its job has been cancelled."""
+
+
+class CancelToken:
+    """Cooperative cancellation shared by every stage of one job.
+
+    Stages call raise_if_cancelled() before each unit of work (an LLM call,
+    a TTS segment), and register callbacks with on_cancel() to abort work
+    that is already in flight, such as an open HTTP stream. watch() polls
+    an external flag (the job store) so a cancel from another request or
+    process reaches the job within one poll interval.
+    """
+
+    def __init__(self, source=None, poll_interval: float = 0.5):
+        self.source = source
+        self.poll_interval = poll_interval
+        self._event = threading.Event()
+        self._stopped = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise PipelineCancelled()
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds, waking early on cancellation; True if cancelled."""
+        return self._event.wait(timeout)
+
+    @contextmanager
+    def on_cancel(self, callback):
+        """Run callback if the token is cancelled while the block is executing."""
+        with self._lock:
+            registered = not self._event.is_set()
+            if registered:
+                self._callbacks.append(callback)
+        if not registered:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+    def watch(self) -> "CancelToken":
+        if self.source is not None:
+            threading.Thread(target=self._watch, daemon=True).start()
+        return self
+
+    def _watch(self):
+        while not self._stopped.wait(self.poll_interval):
+            if self.source():
+                self.cancel()
+                return
+
+    def stop(self):
+        """Stop watching the external flag once the job is over."""
+        self._stopped.set()
+
+
+class TurnQueue:
+    """Hands finished script turns from the text stage to the TTS stage.
+
+    put() is the text stage's on_turn callback; iterating the queue blocks
+    until the next turn, and ends when the producer calls close(). A
+    producer error passed to close() is re-raised in the consumer, and
+    cancellation is noticed on both sides.
+    """
+
+    def __init__(self, is_cancelled=None, poll_interval: float = 0.5):
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.poll_interval = poll_interval
+        self.consumer_failed = threading.Event()
+        self._queue = queue.Queue()
+
+    def put(self, turn):
+        if self.is_cancelled():
+            raise PipelineCancelled()
+        # once TTS has failed the turns have nowhere to go; the text stage still finishes
+        if not self.consumer_failed.is_set():
+            self._queue.put(turn)
+
+    def close(self, error: BaseException = None):
+        self._queue.put((_END, error))
+
+    def __iter__(self):
+        while True:
+            if self.is_cancelled():
+                raise PipelineCancelled()
+            try:
+                item = self._queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            if isinstance(item, tuple) and item and item[0] is _END:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+
+
+class StageThread:
+    """Run fn(turns) on a background thread and hand back its result or exception."""
+
+    def __init__(self, fn, turns: TurnQueue):
+        self._fn = fn
+        self._turns = turns
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            self._result = self._fn(self._turns)
+        except BaseException as e:
+            self._error = e
+            self._turns.consumer_failed.set()
+
+    def start(self) -> "StageThread":
+        self._thread.start()
+        return self
+
+    def result(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
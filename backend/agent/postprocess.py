@@ -0,0 +1,84 @@
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+FULL_SCALE = 32768.0
+
+
+def _db_to_amplitude(db: float) -> float:
+    return FULL_SCALE * 10 ** (db / 20)
+
+
+class PostProcessor:
+    """Vectorized mastering between synthesis and export.
+
+    Each turn has its leading and trailing silence trimmed, is gain-matched
+    to a target RMS level with a peak ceiling, and turns are joined with a
+    fixed pause. Everything is whole-array numpy work on int16 samples.
+    """
+
+    def __init__(self, sample_rate: int = 24_000, target_dbfs: float = -20.0, peak_dbfs: float = -1.0,
+                 silence_dbfs: float = -45.0, pad_ms: int = 40, gap_ms: int = 300):
+        self.sample_rate = sample_rate
+        self.target_rms = _db_to_amplitude(target_dbfs)
+        self.peak = _db_to_amplitude(peak_dbfs)
+        self.silence = _db_to_amplitude(silence_dbfs)
+        self.pad = sample_rate * pad_ms // 1000
+        self.gap = np.zeros(sample_rate * gap_ms // 1000, dtype=np.int16)
+
+    def trim(self, samples: np.ndarray) -> np.ndarray:
+        """Drop leading and trailing samples below the silence threshold, keeping a short pad."""
+        loud = np.flatnonzero(np.abs(samples.astype(np.int32)) > self.silence)
+        if not len(loud):
+            return samples[:0]
+        start = max(0, loud[0] - self.pad)
+        stop = min(len(samples), loud[-1] + 1 + self.pad)
+        return samples[start:stop]
+
+    def normalize(self, samples: np.ndarray) -> np.ndarray:
+        """Scale to the target RMS, backing off so the peak stays under the ceiling."""
+        if not len(samples):
+            return samples
+        audio = samples.astype(np.float32)
+        rms = float(np.sqrt(np.mean(np.square(audio))))
+        peak = float(np.max(np.abs(audio)))
+        if rms == 0.0:
+            return samples
+        gain = min(self.target_rms / rms, self.peak / peak)
+        return np.clip(np.rint(audio * gain), -32768, 32767).astype(np.int16)
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        return self.normalize(self.trim(samples))
+
+    def join(self, segments: list) -> np.ndarray:
+        """Concatenate processed turns with the configured pause between them, in one copy."""
+        if not segments:
+            return np.zeros(0, dtype=np.int16)
+        parts = [segments[0]]
+        for segment in segments[1:]:
+            if len(self.gap):
+                parts.append(self.gap)
+            parts.append(segment)
+        return np.concatenate(parts)
+
+
+def get_postprocessor(sample_rate: int = 24_000):
+    """Build the post-processor from the environment, or None when POSTPROCESS_AUDIO is off.
+
+    AUDIO_TARGET_DBFS (RMS, default -20), AUDIO_PEAK_DBFS (default -1),
+    AUDIO_SILENCE_DBFS (default -45), AUDIO_SILENCE_PAD_MS (default 40) and
+    TURN_GAP_MS (default 300) tune it.
+    """
+    if os.getenv("POSTPROCESS_AUDIO", "true").lower() not in ("1", "true", "yes"):
+        return None
+    return PostProcessor(
+        sample_rate,
+        target_dbfs=float(os.getenv("AUDIO_TARGET_DBFS", -20)),
+        peak_dbfs=float(os.getenv("AUDIO_PEAK_DBFS", -1)),
+        silence_dbfs=float(os.getenv("AUDIO_SILENCE_DBFS", -45)),
+        pad_ms=int(os.getenv("AUDIO_SILENCE_PAD_MS", 40)),
+        gap_ms=int(os.getenv("TURN_GAP_MS", 300)),
+    )
@@ -0,0 +1,120 @@
+import logging
+import math
+import os
+import shutil
+import struct
+import subprocess
+import threading
+
+from scipy.io.wavfile import write
+
+from .artifacts import JobWorkspace
+from .encoding import FORMATS
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST = "playlist.m3u8"
+
+# HLS packed audio (RFC 8216 §3.4) carries each segment's start time in an ID3 PRIV frame
+_TIMESTAMP_OWNER = b"com.apple.streaming.transportStreamTimestamp\x00"
+
+
+def _syncsafe(n: int) -> bytes:
+    return bytes(((n >> shift) & 0x7F) for shift in (21, 14, 7, 0))
+
+
+def timestamp_tag(seconds: float) -> bytes:
+    """ID3v2.4 tag holding the 33-bit, 90 kHz MPEG-2 timestamp a packed-audio segment starts at."""
+    payload = _TIMESTAMP_OWNER + struct.pack(">Q", round(seconds * 90_000) & (2 ** 33 - 1))
+    frame = b"PRIV" + _syncsafe(len(payload)) + b"\x00\x00" + payload
+    return b"ID3\x04\x00\x00" + _syncsafe(len(frame)) + frame
+
+
+class ProgressivePlaylist:
+    """on_segment sink that makes each synthesized turn playable right away.
+
+    Every segment is written to the job workspace as its own MP3 (HLS
+    packed audio, so the event playlist plays in Safari and hls.js, and
+    each file plays in a plain <audio> element), appended to the playlist
+    and announced on SSE as a 'segment' event, so a player can start on
+    turn one while the rest is still being synthesized. finish() closes
+    the playlist with #EXT-X-ENDLIST. Without ffmpeg, segments fall back
+    to WAV files and no playlist is written.
+    """
+
+    def __init__(self, workspace: JobWorkspace, sse=None, sample_rate: int = 24_000):
+        self.workspace = workspace
+        self.sse = sse
+        self.sample_rate = sample_rate
+        self.hls = shutil.which("ffmpeg") is not None
+        self._entries = []
+        self._elapsed = 0.0
+        self._lock = threading.Lock()
+        if self.hls:
+            self._write_playlist(ended=False)
+        else:
+            logger.warning("ffmpeg not found; progressive segments are served as WAV without a playlist")
+
+    @property
+    def playlist_url(self):
+        return f"/audio/{self.workspace.url_for(PLAYLIST)}" if self.hls else None
+
+    def _write_playlist(self, ended: bool):
+        target = max((math.ceil(d) for _, d in self._entries), default=1)
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+        ]
+        for name, duration in self._entries:
+            lines.append(f"#EXTINF:{duration:.3f},")
+            lines.append(name)
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+
+        path = self.workspace.path_for(PLAYLIST)
+        # replace atomically so a player never reads a half-written playlist
+        with open(f"{path}.tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(f"{path}.tmp", path)
+
+    def _write_mp3(self, name: str, samples, start: float):
+        # raw PCM in on stdin, MP3 out on stdout, prefixed with the segment's start timestamp
+        encoded = subprocess.run(
+            ["ffmpeg", "-nostdin", "-loglevel", "error",
+             "-f", "s16le", "-ar", str(self.sample_rate), "-ac", "1", "-i", "pipe:0",
+             *FORMATS["mp3"]["args"], "-id3v2_version", "0", "-write_xing", "0", "-f", "mp3", "pipe:1"],
+            input=samples.astype("<i2").tobytes(), capture_output=True, check=True,
+        ).stdout
+        with open(self.workspace.path_for(name), "wb") as f:
+            f.write(timestamp_tag(start) + encoded)
+
+    def __call__(self, index: int, speaker: str, samples):
+        duration = len(samples) / self.sample_rate
+        with self._lock:
+            start = self._elapsed
+            self._elapsed += duration
+        if self.hls:
+            name = f"segment_{index:04d}.mp3"
+            self._write_mp3(name, samples, start)
+            with self._lock:
+                self._entries.append((name, duration))
+                self._write_playlist(ended=False)
+        else:
+            name = f"segment_{index:04d}.wav"
+            write(self.workspace.path_for(name), self.sample_rate, samples)
+        if self.sse:
+            self.sse.publish({
+                "index": index,
+                "speaker": speaker,
+                "url": f"/audio/{self.workspace.url_for(name)}",
+                "duration": round(duration, 3),
+                "playlist": self.playlist_url,
+            }, type="segment")
+
+    def finish(self):
+        if self.hls:
+            with self._lock:
+                self._write_playlist(ended=True)
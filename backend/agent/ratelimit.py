@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+import logging
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBucket:
+    """Token bucket shared by every thread in this process."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, or return how many seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def adjust(self, factor: float, step: float, min_rate: float, max_rate: float) -> float:
+        with self._lock:
+            self.rate = min(max_rate, max(min_rate, self.rate * factor + step))
+            return self.rate
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+            # refill from the end of the pause, not through it
+            self._updated = self._paused_until
+
+
+# Atomic bucket operations so every worker process draws from one budget
+_RESERVE_LUA = """
+local s = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate', 'paused_until')
+local now = tonumber(ARGV[1])
+local burst = tonumber(ARGV[3])
+local rate = tonumber(s[3]) or tonumber(ARGV[2])
+local tokens = tonumber(s[1]) or burst
+local updated = tonumber(s[2]) or now
+local paused = tonumber(s[4]) or 0
+if now < paused then
+    return tostring(paused - now)
+end
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return tostring(wait)
+"""
+
+_ADJUST_LUA = """
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+rate = rate * tonumber(ARGV[2]) + tonumber(ARGV[3])
+rate = math.min(tonumber(ARGV[5]), math.max(tonumber(ARGV[4]), rate))
+redis.call('HSET', KEYS[1], 'rate', rate)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+return tostring(rate)
+"""
+
+_PAUSE_LUA = """
+local until_ts = tonumber(ARGV[1]) + tonumber(ARGV[2])
+local paused = math.max(tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0, until_ts)
+redis.call('HSET', KEYS[1], 'paused_until', paused, 'tokens', 0, 'updated', paused)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class RedisBucket:
+    """Token bucket kept in Redis, falling back to a local bucket if Redis is unreachable."""
+
+    def __init__(self, url: str, rate: float, burst: float, key: str = "ellipsis:llm_rate", ttl: int = 3600):
+        import redis
+
+        self._errors = (redis.RedisError,)
+        self._redis = redis.Redis.from_url(url)
+        self._reserve = self._redis.register_script(_RESERVE_LUA)
+        self._adjust = self._redis.register_script(_ADJUST_LUA)
+        self._pause = self._redis.register_script(_PAUSE_LUA)
+        self._local = LocalBucket(rate, burst)
+        self.key = key
+        self.ttl = ttl
+        self.default_rate = rate
+        self.burst = burst
+
+    @property
+    def rate(self) -> float:
+        try:
+            value = self._redis.hget(self.key, "rate")
+        except self._errors:
+            return self._local.rate
+        return float(value) if value is not None else self.default_rate
+
+    def reserve(self) -> float:
+        try:
+            return float(self._reserve(keys=[self.key], args=[time.time(), self.default_rate, self.burst, self.ttl]))
+        except self._errors:
+            logger.warning("Rate limiter Redis unavailable, using local bucket", exc_info=True)
+            return self._local.reserve()
+
+    def adjust(self, factor: float, step: float, min_rate: float, max_rate: float) -> float:
+        self._local.adjust(factor, step, min_rate, max_rate)
+        try:
+            return float(self._adjust(keys=[self.key], args=[self.default_rate, factor, step, min_rate, max_rate, self.ttl]))
+        except self._errors:
+            return self._local.rate
+
+    def pause(self, seconds: float):
+        self._local.pause(seconds)
+        try:
+            self._pause(keys=[self.key], args=[time.time(), seconds, self.ttl])
+        except self._errors:
+            pass
+
+
+class RateLimiter:
+    """Adaptive (AIMD) limiter in front of the LLM API.
+
+    Each 429 halves the shared rate and a Retry-After pauses every caller;
+    successful calls creep the rate back up towards the configured maximum.
+    """
+
+    def __init__(self, bucket, min_rate: float, max_rate: float,
+                 decrease: float = 0.5, recovery: float = None, max_sleep: float = 1.0,
+                 max_pause: float = 60.0):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.decrease = decrease
+        self.recovery = recovery if recovery is not None else max_rate * 0.05
+        # wake up periodically so rate changes made by others are picked up
+        self.max_sleep = max_sleep
+        # one server's Retry-After must not freeze every caller for long
+        self.max_pause = max_pause
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def acquire(self, cancel=None):
+        """Block until the shared budget allows one more request.
+
+        With a CancelToken the wait ends early, raising PipelineCancelled.
+        """
+        while True:
+            if cancel:
+                cancel.raise_if_cancelled()
+            wait = self.bucket.reserve()
+            if wait <= 0:
+                return
+            if cancel:
+                cancel.wait(min(wait, self.max_sleep))
+            else:
+                time.sleep(min(wait, self.max_sleep))
+
+    def on_success(self):
+        if self.bucket.rate < self.max_rate:
+            self.bucket.adjust(1.0, self.recovery, self.min_rate, self.max_rate)
+
+    def on_throttle(self, retry_after: float = None):
+        self.bucket.adjust(self.decrease, 0.0, self.min_rate, self.max_rate)
+        self.pause(retry_after)
+
+    def pause(self, seconds: float = None):
+        """Hold back every caller sharing the bucket for the given number of seconds (up to max_pause)."""
+        if seconds:
+            self.bucket.pause(min(seconds, self.max_pause))
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    """Return the process-wide limiter configured from the environment.
+
+    LLM_RATE_PER_MINUTE / LLM_RATE_BURST / LLM_MIN_RATE_PER_MINUTE size the
+    bucket; LLM_MAX_PAUSE (default 60 s) caps how long a Retry-After may pause
+    it; set LLM_RATE_LIMIT_REDIS_URL to share it across worker processes.
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                max_rate = float(os.getenv("LLM_RATE_PER_MINUTE", 50)) / 60
+                min_rate = float(os.getenv("LLM_MIN_RATE_PER_MINUTE", 2)) / 60
+                burst = float(os.getenv("LLM_RATE_BURST", 5))
+                redis_url = os.getenv("LLM_RATE_LIMIT_REDIS_URL")
+                if redis_url:
+                    bucket = RedisBucket(redis_url, max_rate, burst)
+                else:
+                    bucket = LocalBucket(max_rate, burst)
+                _limiter = RateLimiter(bucket, min_rate, max_rate,
+                                       max_pause=float(os.getenv("LLM_MAX_PAUSE", 60)))
+    return _limiter
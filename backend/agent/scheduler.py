@@ -0,0 +1,141 @@
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# lower runs first; short previews jump ahead of full episodes
+PRIORITIES = {"preview": 0, "episode": 1}
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the scheduler's queue is at capacity."""
+
+    def __init__(self, depth: int, retry_after: float):
+        super().__init__(f"Job queue is full ({depth} waiting)")
+        self.depth = depth
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """Fixed pool of pipeline workers fed from a bounded priority queue.
+
+    submit() never blocks: once max_queued jobs are waiting it raises
+    QueueFull, which the API turns into a 429. Jobs of the same priority
+    run in submission order. Wait times are tracked as an exponential
+    moving average, used for Retry-After hints and stats().
+    """
+
+    def __init__(self, workers: int = 2, max_queued: int = 16):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.avg_wait = 0.0
+        self.avg_run = 0.0
+        self._queue = queue.PriorityQueue()
+        self._waiting = {}  # job_id -> (priority, seq)
+        self._running = set()
+        self._dropped = set()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job_id: str, fn, *args, priority: str = "episode") -> int:
+        """Queue fn(*args) under job_id and return its 1-based queue position."""
+        rank = PRIORITIES.get(priority, PRIORITIES["episode"])
+        with self._lock:
+            if len(self._waiting) >= self.max_queued:
+                raise QueueFull(len(self._waiting), self.retry_after())
+            seq = next(self._seq)
+            self._waiting[job_id] = (rank, seq)
+            self._queue.put((rank, seq, job_id, fn, args, time.monotonic()))
+            return self._position(job_id)
+
+    def _position(self, job_id: str) -> int:
+        mine = self._waiting[job_id]
+        return 1 + sum(1 for other in self._waiting.values() if other < mine)
+
+    def position(self, job_id: str):
+        """1-based queue position, 0 once the job is running, None when unknown or finished."""
+        with self._lock:
+            if job_id in self._running:
+                return 0
+            if job_id not in self._waiting:
+                return None
+            return self._position(job_id)
+
+    def discard(self, job_id: str) -> bool:
+        """Drop a job that hasn't started yet; returns False when it is already running or gone."""
+        with self._lock:
+            if self._waiting.pop(job_id, None) is None:
+                return False
+            self._dropped.add(job_id)
+            return True
+
+    def retry_after(self) -> float:
+        # rough time until a slot frees up: one average run spread across the pool
+        return max(1.0, self.avg_run / max(1, self.workers))
+
+    def _work(self):
+        while True:
+            _, _, job_id, fn, args, queued_at = self._queue.get()
+            with self._lock:
+                if job_id in self._dropped:
+                    self._dropped.discard(job_id)
+                    continue
+                self._waiting.pop(job_id, None)
+                self._running.add(job_id)
+                self.avg_wait = 0.8 * self.avg_wait + 0.2 * (time.monotonic() - queued_at)
+            started = time.monotonic()
+            try:
+                fn(*args)
+            except Exception:
+                logger.exception("Job %s failed", job_id)
+            finally:
+                with self._lock:
+                    self._running.discard(job_id)
+                    self.avg_run = 0.8 * self.avg_run + 0.2 * (time.monotonic() - started)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_priority = {name: 0 for name in PRIORITIES}
+            names = {rank: name for name, rank in PRIORITIES.items()}
+            for rank, _ in self._waiting.values():
+                by_priority[names[rank]] += 1
+            return {
+                "workers": self.workers,
+                "running": len(self._running),
+                "queued": len(self._waiting),
+                "max_queued": self.max_queued,
+                "queued_by_priority": by_priority,
+                "avg_wait_seconds": round(self.avg_wait, 2),
+                "avg_run_seconds": round(self.avg_run, 2),
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Return the process-wide scheduler, sized by JOB_WORKERS (default 2) and JOB_QUEUE_SIZE (default 16)."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = JobScheduler(
+                    workers=int(os.getenv("JOB_WORKERS", 2)),
+                    max_queued=int(os.getenv("JOB_QUEUE_SIZE", 16)),
+                )
+    return _scheduler
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_WHITESPACE = re.compile(r"\s+")
+
+# record fields a late joiner copies from the flight so far
+_SHARED_FIELDS = ("state", "stage", "stages", "artifacts", "drafts", "script")
+
+
+def flight_key(query: str, options: dict = None) -> str:
+    """Identity of a generate request: case-folded, whitespace-normalized query plus its options."""
+    normalized = _WHITESPACE.sub(" ", unicodedata.normalize("NFC", query)).strip().casefold()
+    canonical = json.dumps([normalized, options or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One running pipeline and every job attached to it.
+
+    The leader's job id names the pipeline (scheduler slot, workspace);
+    stage, artifact and outcome updates, and SSE events, are fanned out
+    to every member job, so each caller sees the pipeline as its own.
+    """
+
+    def __init__(self, key: str, leader: str, jobs, sse=None):
+        self.key = key
+        self.leader = leader
+        self.jobs = jobs
+        self.sse = sse
+        self._members = [leader]
+        self._lock = threading.RLock()
+
+    @property
+    def members(self) -> list:
+        with self._lock:
+            return list(self._members)
+
+    def _attach(self, job_id: str):
+        with self._lock:
+            current = next((r for r in map(self.jobs.get, self._members) if r), None)
+            if current:
+                self.jobs.update(job_id, lambda r: r.update({f: current[f] for f in _SHARED_FIELDS if f in current}))
+            self.jobs.update(job_id, lambda r: r.update(leader=self.leader))
+            self._members.append(job_id)
+
+    def _detach(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id not in self._members:
+                return False
+            self._members.remove(job_id)
+            return True
+
+    def is_cancelled(self) -> bool:
+        """True once every member has cancelled (or left)."""
+        return all(self.jobs.is_cancelled(m) for m in self.members)
+
+    def publish(self, data, type=None, **kwargs):
+        # drafts and the script also land on the records, so late joiners and reconnects can catch up
+        if type == "persona":
+            self._each("update", lambda r: r.setdefault("drafts", {}).update({data["persona"]: data["response"]}))
+        elif type == "script":
+            self._each("update", lambda r: r.update(script=data["script"]))
+        # sse stand-in: each member browser listens on its own job channel
+        for job_id in self.members:
+            self.sse.publish(data, type=type, channel=job_id, **kwargs)
+
+    def _each(self, method: str, *args, **kwargs):
+        with self._lock:
+            for job_id in self._members:
+                getattr(self.jobs, method)(job_id, *args, **kwargs)
+
+    def set_state(self, state: str):
+        self._each("set_state", state)
+
+    def start_stage(self, stage: str):
+        self._each("start_stage", stage)
+
+    def end_stage(self, stage: str):
+        self._each("end_stage", stage)
+
+    def add_artifact(self, name: str, url: str):
+        self._each("add_artifact", name, url)
+
+    def finish(self, state: str, error: str = None):
+        with self._lock:
+            for job_id in self._members:
+                record = self.jobs.get(job_id)
+                # a member that asked to cancel doesn't get to see it succeed
+                outcome = "cancelled" if record and record["cancel_requested"] else state
+                self.jobs.finish(job_id, outcome, error=error if outcome == state else None)
+
+
+class SingleFlight:
+    """Registry of in-flight pipelines, keyed by flight_key().
+
+    join() either starts a new flight (the caller leads it and must run
+    the pipeline) or attaches the caller to the one already queued or
+    running. end() closes a flight to new joiners once its pipeline is over.
+
+    Events a late joiner missed are not replayed; its record carries the
+    persona drafts, script, stages and artifacts published so far.
+    """
+
+    def __init__(self, jobs, sse=None):
+        self.jobs = jobs
+        self.sse = sse
+        self._flights = {}
+        self._by_job = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: str, job_id: str):
+        """Return (flight, is_leader) for a freshly created job."""
+        with self._lock:
+            flight = self._flights.get(key)
+            # a flight whose every member cancelled (here or in another process) is still
+            # unwinding; start a fresh one rather than attach to a doomed pipeline
+            if flight is not None and flight.is_cancelled():
+                del self._flights[key]
+                flight = None
+            if flight is None:
+                flight = self._flights[key] = Flight(key, job_id, self.jobs, self.sse)
+                leader = True
+            else:
+                flight._attach(job_id)
+                leader = False
+            self._by_job[job_id] = flight
+            return flight, leader
+
+    def leave(self, job_id: str):
+        """Detach a cancelled job from its flight; returns the flight, or None if it wasn't in one."""
+        with self._lock:
+            flight = self._by_job.pop(job_id, None)
+            if flight is None or not flight._detach(job_id):
+                return None
+            # nobody is left to listen: close it to new joiners now, not once it has unwound
+            if not flight.members and self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            return flight
+
+    def end(self, flight: Flight):
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            for job_id in flight.members:
+                self._by_job.pop(job_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flights": len(self._flights),
+                "jobs": len(self._by_job),
+            }
+
+
+_flights = None
+_flights_lock = threading.Lock()
+
+
+def coalescing_enabled() -> bool:
+    return os.getenv("COALESCE_JOBS", "true").lower() in ("1", "true", "yes")
+
+
+def get_flights(jobs, sse=None) -> SingleFlight:
+    """Return the process-wide flight registry (flights only span this process's scheduler)."""
+    global _flights
+    if _flights is None:
+        with _flights_lock:
+            if _flights is None:
+                _flights = SingleFlight(jobs, sse)
+    return _flights
@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+# Minimum seconds between two delta events of one stream
+DELTA_INTERVAL = float(os.getenv("SSE_DELTA_INTERVAL", 0.25))
+
+
+def streaming_enabled() -> bool:
+    return os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes")
+
+
+def with_app_context(fn):
+    """Wrap fn so it runs inside the caller's Flask app context (sse.publish needs one)."""
+    if not has_app_context():
+        return fn
+    app = current_app._get_current_object()
+
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def _partial_tag(text: str, tag: str) -> int:
+    """Length of the longest suffix of text that is a proper prefix of tag."""
+    for k in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:k]):
+            return k
+    return 0
+
+
+class DeltaPublisher:
+    """Callable on_delta sink that forwards partial LLM text to SSE in throttled batches.
+
+    Text inside <think>...</think> (reasoning models) is held back.
+    """
+
+    def __init__(self, sse, event_type: str, fields: dict = None, interval: float = DELTA_INTERVAL):
+        self.sse = sse
+        self.event_type = event_type
+        self.fields = fields or {}
+        self.interval = interval
+        self._pending = []
+        self._last_publish = 0.0
+        self._buffer = ""
+        self._in_think = False
+        self._lock = threading.Lock()
+
+    def _visible_text(self, delta: str) -> str:
+        """Return the part of delta that lies outside reasoning blocks."""
+        self._buffer += delta
+        out = []
+        while True:
+            tag = "</think>" if self._in_think else "<think>"
+            idx = self._buffer.find(tag)
+            if idx == -1:
+                # a tag may be split across deltas: hold back a matching tail
+                keep = _partial_tag(self._buffer, tag)
+                if not self._in_think:
+                    out.append(self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                return "".join(out)
+            if not self._in_think:
+                out.append(self._buffer[:idx])
+            self._buffer = self._buffer[idx + len(tag):]
+            self._in_think = not self._in_think
+
+    def __call__(self, delta: str):
+        with self._lock:
+            visible = self._visible_text(delta)
+            if visible:
+                self._pending.append(visible)
+            if self._pending and time.monotonic() - self._last_publish >= self.interval:
+                self._publish()
+
+    def flush(self):
+        with self._lock:
+            if not self._in_think and self._buffer:
+                self._pending.append(self._buffer)
+            self._buffer = ""
+            if self._pending:
+                self._publish()
+
+    def _publish(self):
+        self.sse.publish({**self.fields, "delta": "".join(self._pending)}, type=self.event_type)
+        self._pending = []
+        self._last_publish = time.monotonic()
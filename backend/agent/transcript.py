@@ -0,0 +1,74 @@
+import re
+
+_TAG = re.compile(r"\[(S\d+)\]")
+# a "[", "[S" or "[S12" at the end of a chunk may still become a speaker tag
+_PARTIAL_TAG = re.compile(r"\[(?:S\d*)?")
+_CITATION = re.compile(r"\[\d+\]")
+
+
+def clean_line(content: str) -> str:
+    # Remove asterisks and any [0-9] tags inside content
+    content = content.strip()
+    content = content.replace("*", "")
+    content = _CITATION.sub("", content)  # remove tags like [1], [23], etc.
+    return content.strip()
+
+
+class TranscriptParser:
+    """Incremental [Sn] transcript parser.
+
+    feed() takes chunks as they stream in and returns the (speaker, line)
+    turns closed by the arrival of the next [Sn] tag; close() returns the
+    last turn at end of stream. On a complete transcript the result is the
+    same as generator.parse_transcript.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._speaker = None
+
+    def _scan_start(self, old_len: int) -> int:
+        start = self._buffer.rfind("[", 0, old_len)
+        if start != -1 and _PARTIAL_TAG.fullmatch(self._buffer, start, old_len):
+            return start
+        return old_len
+
+    def _turn(self, raw: str):
+        # the tag may be followed by a colon, as in "[S1]: Hello"
+        if raw.startswith(":"):
+            raw = raw[1:]
+        return (self._speaker, clean_line(raw))
+
+    def feed(self, chunk: str) -> list:
+        old_len = len(self._buffer)
+        self._buffer += chunk
+        turns = []
+        pos = self._scan_start(old_len)
+        while True:
+            match = _TAG.search(self._buffer, pos)
+            if match is None:
+                break
+            if self._speaker is not None:
+                turns.append(self._turn(self._buffer[:match.start()]))
+            self._speaker = match.group(1)
+            self._buffer = self._buffer[match.end():]
+            pos = 0
+        if self._speaker is None:
+            # text before the first tag is never part of a turn; keep only a possible partial tag
+            keep = self._scan_start(len(self._buffer))
+            self._buffer = self._buffer[keep:]
+        return turns
+
+    def close(self) -> list:
+        turns = [self._turn(self._buffer)] if self._speaker is not None else []
+        self._buffer = ""
+        self._speaker = None
+        return turns
+
+
+def iter_turns(chunks):
+    """Yield (speaker, line) turns from an iterable of text chunks as soon as each one is complete."""
+    parser = TranscriptParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
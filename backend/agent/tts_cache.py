@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode and whitespace normalization, so lines that only differ in spacing share an entry."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class SegmentCache:
+    """Size-capped on-disk LRU of synthesized segments, stored as .npy files.
+
+    Entries are keyed by (model, voice_id, normalized text, sample rate);
+    a hit refreshes the file's mtime, and the least recently used files are
+    removed once the directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, model_id: str, sample_rate: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.model_id = model_id
+        self.sample_rate = sample_rate
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".npy"))
+
+    def key(self, voice_id: str, text: str) -> str:
+        raw = "\x1f".join([self.model_id, voice_id, normalize_text(text), str(self.sample_rate)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, voice_id: str, text: str):
+        path = self._path(self.key(voice_id, text))
+        try:
+            samples = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return samples
+
+    def put(self, voice_id: str, text: str, samples: np.ndarray):
+        path = self._path(self.key(voice_id, text))
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, samples)
+            size = os.path.getsize(tmp)
+            existed = os.path.exists(path)
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Could not write TTS cache entry", exc_info=True)
+            return
+        with self._lock:
+            if not existed:
+                self._size += size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is back under 90% of its cap."""
+        entries = sorted(
+            (e for e in os.scandir(self.directory) if e.name.endswith(".npy")),
+            key=lambda e: e.stat().st_mtime
+        )
+        self._size = sum(e.stat().st_size for e in entries)
+        target = self.max_bytes * 0.9
+        for entry in entries:
+            if self._size <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except OSError:
+                continue
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache(sample_rate: int = 24_000):
+    """Return the process-wide segment cache, or None when TTS_CACHE_DIR is set to "none".
+
+    TTS_CACHE_DIR (default cache/tts), TTS_CACHE_MAX_BYTES (default 2 GiB) and
+    TTS_MODEL_ID (part of every key, change it when swapping models) configure it.
+    """
+    global _cache
+    directory = os.getenv("TTS_CACHE_DIR", "cache/tts")
+    if directory.lower() == "none":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SegmentCache(
+                    directory,
+                    int(os.getenv("TTS_CACHE_MAX_BYTES", 2 * 1024 ** 3)),
+                    os.getenv("TTS_MODEL_ID", "orpheus-3b-0.1-ft-q4_k_m"),
+                    sample_rate,
+                )
+    return _cache
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WARMUP_TEXT = "Hello, and welcome to the show."
+
+_engine = None
+_load_lock = threading.Lock()
+# llama.cpp contexts are not thread-safe: one synthesis at a time per engine
+_synth_lock = threading.Lock()
+_ready = threading.Event()
+_load_error = None
+
+
+def _load_engine():
+    from orpheus_cpp import OrpheusCpp
+
+    n_threads = os.getenv("TTS_N_THREADS")
+    kwargs = {"n_threads": int(n_threads)} if n_threads else {}
+    return OrpheusCpp(verbose=False, lang="en", **kwargs)
+
+
+def get_engine():
+    """Return the process-wide OrpheusCpp engine, loading the model on first use."""
+    global _engine, _load_error
+    if _engine is None:
+        with _load_lock:
+            if _engine is None:
+                try:
+                    _engine = _load_engine()
+                except Exception as e:
+                    _load_error = e
+                    raise
+    return _engine
+
+
+@contextmanager
+def engine_session():
+    """Borrow the shared engine for a synthesis run; other pipeline threads wait their turn."""
+    engine = get_engine()
+    with _synth_lock:
+        yield engine
+    _ready.set()
+
+
+def synthesize(text: str, voice_id: str):
+    """Synthesize one speaker turn on the shared engine and return its int16 samples."""
+    import numpy as np
+
+    buffer = []
+    with engine_session() as engine:
+        for _, chunk in engine.stream_tts_sync(text, options={"voice_id": voice_id}):
+            buffer.append(chunk)
+    return np.concatenate(buffer, axis=1)[0]
+
+
+def warmup(voice_id: str = "tara"):
+    """Load the model and run one short synthesis so the first job doesn't pay for it."""
+    with engine_session() as engine:
+        for _ in engine.stream_tts_sync(WARMUP_TEXT, options={"voice_id": voice_id}):
+            pass
+    logger.info("TTS engine loaded and warmed up")
+
+
+def start_warmup() -> threading.Thread:
+    def _run():
+        from . import tts_pool
+        try:
+            if tts_pool.get_pool() is not None:
+                tts_pool.warmup_pool()
+                _ready.set()
+            else:
+                warmup()
+        except Exception:
+            logger.exception("TTS warmup failed")
+
+    thread = threading.Thread(target=_run, name="tts-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def status() -> dict:
+    from . import tts_pool
+    return {
+        "workers": tts_pool.worker_count(),
+        "loaded": _engine is not None,
+        "ready": is_ready(),
+        "error": str(_load_error) if _load_error else None,
+    }
@@ -0,0 +1,73 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(n_threads: int):
+    # a worker synthesizes in-process; it must never build a pool of its own
+    os.environ["TTS_WORKERS"] = "0"
+    # each worker owns its engine; keep its BLAS/llama.cpp threads to its share of the cores
+    if n_threads:
+        os.environ["TTS_N_THREADS"] = str(n_threads)
+        os.environ["OMP_NUM_THREADS"] = str(n_threads)
+    from . import tts_engine
+    tts_engine.warmup()
+
+
+def _synthesize(text: str, voice_id: str):
+    from . import tts_engine
+    return tts_engine.synthesize(text, voice_id)
+
+
+def _ping():
+    return os.getpid()
+
+
+def worker_count() -> int:
+    """TTS_WORKERS processes synthesize segments in parallel; 0 or 1 keeps TTS in-process."""
+    return int(os.getenv("TTS_WORKERS", 0))
+
+
+def get_pool():
+    """Return the process-wide TTS worker pool, or None when TTS runs in-process."""
+    global _pool
+    workers = worker_count()
+    if workers <= 1:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                threads = int(os.getenv("TTS_THREADS_PER_WORKER", max(1, (os.cpu_count() or 1) // workers)))
+                # spawn, not fork: the parent holds threads and possibly a loaded model
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(threads,),
+                )
+    return _pool
+
+
+def warmup_pool():
+    """Start the workers, which load and warm their engines in the initializer, and wait for them to answer."""
+    pool = get_pool()
+    if pool is None:
+        return
+    wait([pool.submit(_ping) for _ in range(worker_count())])
+    logger.info("TTS worker pool ready with %d workers", worker_count())
+
+
+def submit(text: str, voice_id: str):
+    """Queue one segment on the pool; returns a Future resolving to its int16 samples."""
+    return get_pool().submit(_synthesize, text, voice_id)
@@ -10,18 +10,36 @@
 #     sf.write("simple.mp3", output, 44100)
 
 from scipy.io.wavfile import write
-from orpheus_cpp import OrpheusCpp
 import numpy as np
 from dotenv import load_dotenv
-from pydub import AudioSegment
+from . import tts_pool
+from .tts_engine import synthesize
+from .artifacts import JobWorkspace
+from .tts_cache import get_tts_cache
+from .chunking import split_turn, crossfade_join
+from .postprocess import get_postprocessor
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 import os
 load_dotenv()
-# List your WAV files in order
 
+SAMPLE_RATE = 24_000
+# long turns are synthesized sentence by sentence, so latency and memory per call stay bounded
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", 300))
+TTS_CROSSFADE_MS = int(os.getenv("TTS_CROSSFADE_MS", 30))
 
 
+def _resolve(future: Future, cancel=None):
+    # wait for a pool segment, but notice a cancelled job while waiting
+    while True:
+        try:
+            return future.result(timeout=None if cancel is None else 0.5)
+        except FutureTimeout:
+            cancel.raise_if_cancelled()
 
-def text_2_audio(texts = ''):
+
+def text_2_audio(texts = '', job_id=None, workspace=None, on_segment=None, cancel=None):
+    # on_segment(index, speaker, samples) is called in script order as soon as each turn is ready
+    # cancel: optional CancelToken, checked before every TTS segment
     voices = {
     'S1' : 'tara',
     'S2' : 'leo',
@@ -33,8 +51,6 @@ def text_2_audio(texts = ''):
     'S8' : 'zoe'
     }
     
-    orpheus = OrpheusCpp(verbose=False, lang="en")
-
     # buffer = []
     # for i, (sr, chunk) in enumerate(orpheus.stream_tts_sync(text, options={"voice_id": "tara"})):
     #    buffer.append(chunk)
@@ -42,27 +58,73 @@ def text_2_audio(texts = ''):
     # buffer = np.concatenate(buffer, axis=1)
     # write("output.wav", 24_000, np.concatenate(buffer))
 
-    file_paths = []
-
-    for i,(v,text) in enumerate(texts):
-        buffer = []
-        wav_file = f"segment_{i}.wav"
-        for _, chunk in orpheus.stream_tts_sync(text, options={"voice_id": voices[v]}):
-            buffer.append(chunk)
-            print(f"Generated chunk {i}")
-        buffer = np.concatenate(buffer, axis=1)
-        file_paths.append(wav_file)
-        write(wav_file, 24_000, np.concatenate(buffer))
-
-    combined = AudioSegment.empty()
-
-    for wav_file in file_paths:
-        combined += AudioSegment.from_wav(wav_file)
-
-    audio_output_dir = "static/audio"
-    os.makedirs(audio_output_dir, exist_ok=True)
-    final_audio_path = os.path.join(audio_output_dir, "final_podcast.wav")
-    combined.export(final_audio_path, format="wav")
-
-    return "final_podcast.wav"
-
+    # segments go to the TTS worker pool when one is configured, else to the in-process engine
+    pool = tts_pool.get_pool()
+    cache = get_tts_cache(SAMPLE_RATE)
+    fade = SAMPLE_RATE * TTS_CROSSFADE_MS // 1000
+    # trimmed and loudness-matched per turn, before progressive playback or export
+    post = get_postprocessor(SAMPLE_RATE)
+    turn_keys = []
+    segments = []
+    emitted = 0
+
+    def emit_ready(block=False):
+        # resolve turns in script order, whichever worker finished first
+        nonlocal emitted
+        while emitted < len(segments):
+            pieces = segments[emitted]
+            if not block and any(isinstance(p, Future) and not p.done() for p in pieces):
+                return
+            speaker, voice_id, chunks = turn_keys[emitted]
+            for j, piece in enumerate(pieces):
+                if isinstance(piece, Future):
+                    pieces[j] = _resolve(piece, cancel)
+                    if cache:
+                        cache.put(voice_id, chunks[j], pieces[j])
+            samples = crossfade_join(pieces, fade)
+            samples = segments[emitted] = post(samples) if post else samples
+            if on_segment:
+                on_segment(emitted, speaker, samples)
+            emitted += 1
+
+    try:
+        for i,(v,text) in enumerate(texts):
+            voice_id = voices[v]
+            chunks = split_turn(text, TTS_MAX_CHARS)
+            pieces = []
+            for chunk in chunks:
+                if cancel:
+                    cancel.raise_if_cancelled()
+                samples = cache.get(voice_id, chunk) if cache else None
+                if samples is None:
+                    samples = tts_pool.submit(chunk, voice_id) if pool else synthesize(chunk, voice_id)
+                    if cache and not pool:
+                        cache.put(voice_id, chunk, samples)
+                pieces.append(samples)
+            turn_keys.append((v, voice_id, chunks))
+            segments.append(pieces)
+            print(f"Generated segment {i} ({len(chunks)} chunks)")
+            emit_ready()
+        emit_ready(block=True)
+    except BaseException:
+        for pieces in segments:
+            for piece in (pieces if isinstance(pieces, list) else ()):
+                if isinstance(piece, Future):
+                    piece.cancel()
+        raise
+
+    # one preallocated concatenation (with turn gaps when post-processing), written to disk once
+    if post:
+        audio = post.join(segments)
+    else:
+        audio = np.concatenate(segments) if segments else np.zeros(0, dtype=np.int16)
+
+    # written into this job's own workspace, then published under a content-hashed name
+    own_workspace = workspace is None
+    workspace = workspace or JobWorkspace(job_id)
+    try:
+        write(workspace.path_for("episode.wav"), SAMPLE_RATE, audio)
+        return workspace.publish("episode.wav")
+    finally:
+        if own_workspace:
+            workspace.cleanup()
@@ -4,8 +4,10 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from routes.api import api_routes
 from flask_sse import sse
-from flask import send_from_directory
 from routes.podbean import podbean_bp
+from routes.audio import audio_bp
+from agent import tts_engine
+import os
 
 app = Flask(__name__)
 # Set the secret key for session management. Used for securely signing the session cookie.
@@ -37,10 +39,34 @@ app.register_blueprint(api_routes, url_prefix='/api')
 
 app.register_blueprint(podbean_bp)
 
-@app.route('/audio/<path:filename>')
-def audio(filename):
-    return send_from_directory('static/audio', filename, mimetype='audio/wav')
+# Episode audio: ranges, ETags and format negotiation
+app.register_blueprint(audio_bp)
+# Let a fronting server (Apache/lighttpd X-Sendfile) stream audio files itself
+app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "false").lower() in ("1", "true", "yes")
+
+@app.route('/ready')
+def ready():
+    tts = tts_engine.status()
+    return jsonify(ready=tts["ready"], tts=tts), (200 if tts["ready"] else 503)
+
+_preloaded = False
+
+def _preload_tts():
+    # load and warm the TTS model in the background so the first job doesn't pay for it
+    global _preloaded
+    if _preloaded:
+        return
+    _preloaded = True
+    if os.getenv("TTS_PRELOAD", "true").lower() in ("1", "true", "yes"):
+        tts_engine.start_warmup()
+
+# Under a WSGI server the model is warmed on the first request, not at import: spawned
+# TTS workers re-import this module as __mp_main__ and must not start warmups (or pools)
+app.before_request(_preload_tts)
 
 if __name__ == "__main__":
+    # with the debug reloader only the serving child process should load the model
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        _preload_tts()
     # enable threading so /stream can stay alive while /generate runs
     app.run(debug=True, port=5000, threaded=True)
\ No newline at end of file
@@ -1,22 +1,40 @@
 from flask import Blueprint, jsonify, request, current_app
 from agent.generator import summarize_contents
 from agent.voice import text_2_audio
+from agent.perplexity import call_perplexity, get_client, SONAR_PRO
+from agent.pipeline import CancelToken, PipelineCancelled, StageThread, TurnQueue
+from agent.tts_cache import get_tts_cache
+from agent.artifacts import JobWorkspace
+from agent.progressive import ProgressivePlaylist
+from agent.encoding import encode_in_background
+from agent.streaming import with_app_context
+from agent.scheduler import PRIORITIES, QueueFull, get_scheduler
+from agent.jobs import get_job_store
+from agent.singleflight import Flight, coalescing_enabled, flight_key, get_flights
 from dotenv import load_dotenv
 from flask_sse import sse
-from threading import Thread
+from threading import Timer
+from functools import partial
 import re
 from uuid import uuid4
 import json
+import os
 
 
 api_routes = Blueprint('api', __name__)
 
 load_dotenv()
 
-# a simple in‐memory flag store
-_cancel_flags: dict[str, bool] = {}
 # In-memory store (replace with DB in production)
 connected_socials = []
+# seconds a trending-topics reply may be reused
+TRENDING_CACHE_TTL = 15 * 60
+# start TTS on each finished script turn instead of waiting for the whole script
+PIPELINED_TTS = os.getenv("PIPELINED_TTS", "true").lower() in ("1", "true", "yes")
+# publish each synthesized turn as its own playable segment (plus an HLS event playlist)
+PROGRESSIVE_AUDIO = os.getenv("PROGRESSIVE_AUDIO", "false").lower() in ("1", "true", "yes")
+# seconds a job's progressive segments stay on disk
+PROGRESSIVE_RETENTION = int(os.getenv("PROGRESSIVE_RETENTION", 3600))
 
 
 @api_routes.route('/connect', methods=['POST'])
@@ -40,44 +58,112 @@ def get_connected_platforms():
     return jsonify({"connected_platforms": connected_socials}), 200
 
 
-def _run_pipeline(query: str, app, job_id: str):
+def _run_pipeline(query: str, app, flight: Flight):
     # push the Flask app context so current_app works
     with app.app_context():
-
-        if _cancel_flags.get(job_id):
-            return
-
-        # 1) Initial persona scripts
-        sse.publish({"status": "initial_response_generation_started"}, type="status")
-        responses, final_script = summarize_contents(query, sse)
-
-        # 2) Publish final script
-        formatted = "\n\n".join(f"**{sp}:** {ln}" for sp, ln in final_script)
-        sse.publish({"script": formatted}, type="script")
-        if _cancel_flags.get(job_id):
-            return
-        sse.publish({"status": "script_ready"}, type="status")
-        
-        if _cancel_flags.get(job_id):
-            return
-        
-        # 4) Generate audio
-        sse.publish({"status": "audio_generation_started"}, type="status")
-
-        if _cancel_flags.get(job_id):
-            return
-        
+        outcome, error = "succeeded", None
+        # a cancel recorded in the job store trips the token within one poll interval,
+        # but only once every job attached to this pipeline has been cancelled
+        cancel = CancelToken(flight.is_cancelled).watch()
         try:
-            audio_file = text_2_audio(final_script)
-            sse.publish({"audio": f"/audio/{audio_file}"}, type="audio")
-            sse.publish({"status": "podcast_generated"}, type="status")
+            if flight.is_cancelled():
+                raise PipelineCancelled()
+            flight.set_state("running")
+            _generate_episode(query, flight, cancel)
+        except PipelineCancelled:
+            outcome = "cancelled"
         except Exception as e:
-            current_app.logger.exception("TTS generation failed")
-            sse.publish({
-                "status": "audio_error",
-                "message": str(e)
-            }, type="status")
-            return
+            if cancel.is_cancelled():
+                outcome = "cancelled"
+            else:
+                outcome, error = "failed", str(e)
+                raise
+        finally:
+            cancel.stop()
+            # close the flight first, so a late identical request starts afresh instead of
+            # attaching to a finished pipeline
+            get_flights(get_job_store(), sse).end(flight)
+            flight.finish(outcome, error)
+
+
+def _generate_episode(query: str, flight: Flight, cancel: CancelToken):
+    # the flight fans every event out to each attached job's channel (/stream?channel=<job_id>)
+    # and every stage and artifact out to each attached job's record
+    job_id = flight.leader
+    events = job = flight
+
+    # with progressive audio every synthesized turn is playable before the episode is done
+    audio_kwargs = {"job_id": job_id, "cancel": cancel}
+    playlist = None
+    if PROGRESSIVE_AUDIO:
+        workspace = JobWorkspace(job_id)
+        playlist = ProgressivePlaylist(workspace, events)
+        audio_kwargs.update(workspace=workspace, on_segment=playlist)
+        # keep the segments around for listeners who are still on them
+        cleanup = Timer(PROGRESSIVE_RETENTION, workspace.cleanup)
+        cleanup.daemon = True
+        cleanup.start()
+        if playlist.playlist_url:
+            job.add_artifact("playlist", playlist.playlist_url)
+            events.publish({"playlist": playlist.playlist_url}, type="playlist")
+
+    # with pipelined TTS, finished script turns are synthesized while the rest is still written
+    turns = tts = None
+    if PIPELINED_TTS:
+        turns = TurnQueue(cancel.is_cancelled)
+        job.start_stage("audio")
+        tts = StageThread(with_app_context(partial(text_2_audio, **audio_kwargs)), turns).start()
+
+    # 1) Persona drafts, debate and final script (each tracked as its own stage)
+    events.publish({"status": "initial_response_generation_started"}, type="status")
+    try:
+        responses, final_script = summarize_contents(
+            query, events, on_turn=turns.put if turns else None, cancel=cancel, job=job
+        )
+    except Exception as e:
+        if turns:
+            turns.close(e)
+        raise
+    if turns:
+        turns.close()
+
+    # 2) Publish final script
+    formatted = "\n\n".join(f"**{sp}:** {ln}" for sp, ln in final_script)
+    events.publish({"script": formatted}, type="script")
+    cancel.raise_if_cancelled()
+    events.publish({"status": "script_ready"}, type="status")
+
+    # 3) Generate audio
+    events.publish({"status": "audio_generation_started"}, type="status")
+    cancel.raise_if_cancelled()
+
+    try:
+        if not tts:
+            job.start_stage("audio")
+        audio_file = tts.result() if tts else text_2_audio(final_script, **audio_kwargs)
+        job.end_stage("audio")
+    except PipelineCancelled:
+        raise
+    except Exception as e:
+        # the scheduler logs the traceback once the job is marked failed
+        events.publish({
+            "status": "audio_error",
+            "message": str(e)
+        }, type="status")
+        raise
+
+    if playlist:
+        playlist.finish()
+    job.add_artifact("audio", f"/audio/{audio_file}")
+    events.publish({"audio": f"/audio/{audio_file}"}, type="audio")
+    events.publish({"status": "podcast_generated"}, type="status")
+
+    # Opus/MP3 variants are encoded after the WAV is already out
+    def on_encoded(fmt, name):
+        job.add_artifact(fmt, f"/audio/{name}")
+        events.publish({"format": fmt, "audio": f"/audio/{name}"}, type="encoding")
+
+    encode_in_background(audio_file, with_app_context(on_encoded))
 
 
 
@@ -86,16 +172,40 @@ def generate():
     data = request.json or {}
     query = data.get("query", "")
 
+    # short previews are scheduled ahead of full episodes
+    priority = data.get("priority", "episode")
+    if priority not in PRIORITIES:
+        return jsonify(error=f"priority must be one of {', '.join(PRIORITIES)}"), 400
+
     # capture the true Flask app so the worker thread can push context
     app_obj = current_app._get_current_object()
     
-     # 1) create a new job id + cancellation event
+    # 1) create a new job id + its record in the job store
     job_id = str(uuid4())
-    _cancel_flags[job_id] = False
-
-    Thread(target=_run_pipeline, args=(query, app_obj, job_id), daemon=True).start()
+    jobs = get_job_store()
+    jobs.create(job_id, query=query, priority=priority, leader=None)
+
+    # identical requests in flight share one pipeline; each caller keeps its own job id
+    options = {k: v for k, v in data.items() if k not in ("query", "priority")}
+    key = flight_key(query, options) if coalescing_enabled() else job_id
+    flights = get_flights(jobs, sse)
+    flight, leader = flights.join(key, job_id)
+
+    # a fixed pool of workers runs the pipelines; when its queue is full we shed load
+    scheduler = get_scheduler()
+    if not leader:
+        return jsonify(success=True, jobId=job_id, coalesced=True,
+                       queuePosition=scheduler.position(flight.leader)), 202
+    try:
+        position = scheduler.submit(job_id, _run_pipeline, query, app_obj, flight, priority=priority)
+    except QueueFull as e:
+        flight.finish("failed", error="queue full")
+        flights.end(flight)
+        response = jsonify(error=str(e), queued=e.depth, retryAfter=round(e.retry_after))
+        response.headers["Retry-After"] = str(round(e.retry_after))
+        return response, 429
 
-    return jsonify(success=True, jobId=job_id), 202
+    return jsonify(success=True, jobId=job_id, queuePosition=position), 202
 
 
 
@@ -119,8 +229,8 @@ def trending():
     )
 
     try:
-        from agent.generator import call_perplexity
-        raw = call_perplexity(prompt)
+        # trending changes through the day, so don't serve it from cache for long
+        raw = call_perplexity(prompt, cache_ttl=TRENDING_CACHE_TTL, **SONAR_PRO)
 
         topics = []
         for line in raw.splitlines():
@@ -156,6 +266,37 @@ def trending():
 
     return jsonify(topics=topics)
 
+@api_routes.route('/llm_cache', methods=['GET'])
+def llm_cache_stats():
+    cache = get_client().cache
+    if cache is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **cache.stats())
+
+@api_routes.route('/tts_cache', methods=['GET'])
+def tts_cache_stats():
+    cache = get_tts_cache()
+    if cache is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **cache.stats())
+
+@api_routes.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = get_job_store().get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job"), 404
+    if job["state"] == "queued":
+        job["queuePosition"] = get_scheduler().position(job.get("leader") or job_id)
+    return jsonify(job)
+
+@api_routes.route('/queue', methods=['GET'])
+def queue_stats():
+    scheduler = get_scheduler()
+    job_id = request.args.get("jobId")
+    if job_id:
+        return jsonify(jobId=job_id, position=scheduler.position(job_id))
+    return jsonify(**scheduler.stats(), coalescing=get_flights(get_job_store(), sse).stats())
+
 @api_routes.route('/cancel', methods=['POST'])
 def cancel():
     # read raw body, regardless of content-type
@@ -170,8 +311,18 @@ def cancel():
     if not job_id:
         return jsonify(error="Missing jobId"), 400
 
-    if job_id in _cancel_flags:
-        _cancel_flags[job_id] = True
+    jobs = get_job_store()
+    if jobs.request_cancel(job_id):
+        flights = get_flights(jobs, sse)
+        flight = flights.leave(job_id)
+        if flight is not None:
+            # detached: the pipeline no longer reports to this job, and keeps going for the rest
+            jobs.finish(job_id, "cancelled")
+            if not flight.members and get_scheduler().discard(flight.leader):
+                # nobody is left and it is still queued, so it never takes a worker
+                flights.end(flight)
+        elif get_scheduler().discard(job_id):
+            jobs.finish(job_id, "cancelled")
         return "", 204
 
     return jsonify(error="Unknown job"), 404
\ No newline at end of file
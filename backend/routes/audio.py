@@ -0,0 +1,124 @@
+import os
+from uuid import uuid4
+
+from flask import Blueprint, Response, abort, request, send_from_directory
+from werkzeug.security import safe_join
+
+from agent import artifacts, encoding
+
+audio_bp = Blueprint("audio", __name__)
+
+AUDIO_MIMETYPES = {'.wav': 'audio/wav', '.opus': 'audio/ogg', '.mp3': 'audio/mpeg'}
+IMMUTABLE = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+
+def _etag(path: str) -> str:
+    # a content-hashed name already is a strong validator; other files change with mtime and size
+    if artifacts.is_immutable(path):
+        return os.path.basename(path).replace(".", "-")
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _byte_ranges(ranges, size: int) -> list:
+    """Resolve a Range header's (start, stop) pairs against the file size, dropping unsatisfiable ones."""
+    resolved = []
+    for start, stop in ranges:
+        if start < 0:
+            start, stop = max(0, size + start), size
+        stop = size if stop is None else min(stop, size)
+        if start < stop:
+            resolved.append((start, stop))
+    return resolved
+
+
+def _if_range_matches(path: str, etag: str) -> bool:
+    """True when the request has no If-Range, or its validator still matches the file."""
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return if_range.etag == etag
+    if if_range.date is not None:
+        # Last-Modified is sent with one-second resolution
+        return int(os.path.getmtime(path)) <= if_range.date.timestamp()
+    return True
+
+
+def _multipart_response(path: str, ranges: list, mimetype: str, size: int) -> Response:
+    """206 multipart/byteranges body, streamed from disk part by part."""
+    boundary = uuid4().hex
+    headers = [
+        (f"--{boundary}\r\nContent-Type: {mimetype}\r\n"
+         f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n").encode("ascii")
+        for start, stop in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode("ascii")
+    length = sum(len(h) for h in headers) + sum(stop - start for start, stop in ranges)
+    length += 2 * (len(ranges) - 1) + len(closing)
+
+    def generate():
+        with open(path, "rb") as f:
+            for i, ((start, stop), header) in enumerate(zip(ranges, headers)):
+                yield (b"\r\n" if i else b"") + header
+                f.seek(start)
+                remaining = stop - start
+                while remaining:
+                    block = f.read(min(CHUNK_SIZE, remaining))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    yield block
+        yield closing
+
+    response = Response(
+        generate(),
+        status=206,
+        mimetype=f"multipart/byteranges; boundary={boundary}",
+    )
+    response.content_length = length
+    return response
+
+
+@audio_bp.route('/audio/<path:filename>')
+def audio(filename):
+    # compressed variants are negotiated from ?format=opus|mp3 or the Accept header
+    served, fallback = encoding.negotiate(filename, request.args.get("format"), request.accept_mimetypes)
+    mimetype = AUDIO_MIMETYPES.get(os.path.splitext(served)[1])
+    path = safe_join(artifacts.AUDIO_DIR, served)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    etag = _etag(path)
+    multi = request.range is not None and len(request.range.ranges) > 1
+    if multi and not _if_range_matches(path, etag):
+        # the file changed since the client's copy: send all of it, ignoring Range
+        response = send_from_directory(artifacts.AUDIO_DIR, served, mimetype=mimetype,
+                                       conditional=False, etag=etag)
+    elif multi and not request.if_none_match.contains(etag):
+        size = os.path.getsize(path)
+        ranges = _byte_ranges(request.range.ranges, size)
+        if not ranges:
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+        response = _multipart_response(path, ranges, mimetype or "application/octet-stream", size)
+        response.set_etag(etag)
+    else:
+        # single ranges, If-None-Match/If-Modified-Since and HEAD are handled by werkzeug;
+        # the file is handed to the server's wsgi.file_wrapper (sendfile) or X-Sendfile
+        response = send_from_directory(artifacts.AUDIO_DIR, served, mimetype=mimetype,
+                                       conditional=True, etag=etag)
+
+    response.accept_ranges = "bytes"
+    if filename.endswith('.wav'):
+        response.vary.add("Accept")
+    # content-hashed episodes never change, so browsers and proxies may keep them forever;
+    # a WAV standing in for a variant that isn't encoded yet must be revalidated instead
+    if fallback:
+        response.headers["Cache-Control"] = "no-cache"
+    elif artifacts.is_immutable(served):
+        response.headers["Cache-Control"] = IMMUTABLE
+    elif served.endswith('.m3u8'):
+        # progressive playlists grow while the episode is synthesized
+        response.headers["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# the backend is run from its own directory (python app.py), so import it the same way
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# artifacts reads AUDIO_DIR at import time; point it at a scratch directory first
+os.environ.setdefault("AUDIO_DIR", tempfile.mkdtemp(prefix="ellipsis-audio-"))
+
+
+@pytest.fixture
+def audio_dir():
+    return os.environ["AUDIO_DIR"]
@@ -0,0 +1,118 @@
+import os
+import re
+
+import pytest
+from flask import Flask
+
+from routes.audio import IMMUTABLE, audio_bp
+
+HASHED = "0123456789abcdef0123.wav"
+BODY = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def client(audio_dir):
+    with open(os.path.join(audio_dir, HASHED), "wb") as f:
+        f.write(BODY)
+    app = Flask(__name__)
+    app.register_blueprint(audio_bp)
+    return app.test_client()
+
+
+def test_full_response_is_immutable_with_strong_etag(client):
+    response = client.get(f"/audio/{HASHED}")
+    assert response.status_code == 200
+    assert response.data == BODY
+    assert response.mimetype == "audio/wav"
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Cache-Control"] == IMMUTABLE
+    assert response.headers["ETag"] and not response.headers["ETag"].startswith("W/")
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get(f"/audio/{HASHED}").headers["ETag"]
+    response = client.get(f"/audio/{HASHED}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_single_range(client):
+    response = client.get(f"/audio/{HASHED}", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(BODY)}"
+    assert response.data == BODY[100:200]
+
+
+def test_suffix_range(client):
+    response = client.get(f"/audio/{HASHED}", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.data == BODY[-10:]
+
+
+def test_multi_range_body_and_length(client):
+    response = client.get(f"/audio/{HASHED}", headers={"Range": "bytes=0-9,500-599,-20"})
+    assert response.status_code == 206
+    boundary = re.match(r"multipart/byteranges; boundary=(\S+)", response.headers["Content-Type"]).group(1)
+    body = response.get_data()
+    assert int(response.headers["Content-Length"]) == len(body)
+
+    parts = body.split(f"--{boundary}".encode())
+    assert parts[-1] == b"--\r\n"
+    parts = parts[1:-1]
+    expected = [(0, 10), (500, 600), (len(BODY) - 20, len(BODY))]
+    assert len(parts) == len(expected)
+    for part, (start, stop) in zip(parts, expected):
+        head, payload = part.split(b"\r\n\r\n", 1)
+        assert f"Content-Range: bytes {start}-{stop - 1}/{len(BODY)}".encode() in head
+        assert b"Content-Type: audio/wav" in head
+        # every part's data is followed by the CRLF that precedes the next delimiter
+        assert payload == BODY[start:stop] + b"\r\n"
+
+
+def test_head(client):
+    response = client.head(f"/audio/{HASHED}")
+    assert response.status_code == 200
+    assert int(response.headers["Content-Length"]) == len(BODY)
+    assert response.data == b""
+
+
+@pytest.mark.parametrize("header", ["bytes=20000-20100", "bytes=20000-20100,30000-30100"])
+def test_unsatisfiable_range_is_416(client, header):
+    response = client.get(f"/audio/{HASHED}", headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(BODY)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-9", "bytes=0-9,20-29"])
+def test_stale_if_range_returns_full_body(client, header):
+    response = client.get(f"/audio/{HASHED}", headers={"Range": header, "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.data == BODY
+
+
+def test_multi_range_with_matching_date_if_range(client):
+    last_modified = client.get(f"/audio/{HASHED}").headers["Last-Modified"]
+    response = client.get(f"/audio/{HASHED}", headers={"Range": "bytes=0-9,20-29", "If-Range": last_modified})
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    assert BODY[0:10] in response.data and BODY[20:30] in response.data
+
+
+@pytest.mark.parametrize("header", ["bytes=0-9", "bytes=0-9,20-29"])
+def test_stale_date_if_range_returns_full_body(client, header):
+    stale = "Mon, 01 Jan 2001 00:00:00 GMT"
+    response = client.get(f"/audio/{HASHED}", headers={"Range": header, "If-Range": stale})
+    assert response.status_code == 200
+    assert response.data == BODY
+
+
+@pytest.mark.parametrize("path", ["/audio/../app.py", "/audio/%2e%2e/app.py", "/audio/..%2fapp.py"])
+def test_path_traversal_is_404(client, path):
+    assert client.get(path).status_code == 404
+
+
+def test_missing_variant_falls_back_without_immutable(client):
+    response = client.get(f"/audio/{HASHED}?format=opus")
+    assert response.status_code == 200
+    assert response.mimetype == "audio/wav"
+    assert response.headers["Cache-Control"] == "no-cache"
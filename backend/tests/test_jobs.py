@@ -0,0 +1,47 @@
+from agent.jobs import MemoryJobStore, track_stage
+
+
+def test_stage_falls_back_to_one_still_open():
+    jobs = MemoryJobStore(ttl=60, active_ttl=60)
+    jobs.create("j")
+    # pipelined TTS: audio opens first and outlives the script stages
+    jobs.start_stage("j", "audio")
+    for stage in ("drafts", "debate", "final_script"):
+        jobs.start_stage("j", stage)
+        assert jobs.get("j")["stage"] == stage
+        jobs.end_stage("j", stage)
+        assert jobs.get("j")["stage"] == "audio"
+    jobs.end_stage("j", "audio")
+    assert jobs.get("j")["stage"] is None
+
+
+def test_finish_closes_open_stages():
+    jobs = MemoryJobStore(ttl=60, active_ttl=60)
+    jobs.create("j")
+    jobs.start_stage("j", "drafts")
+    jobs.finish("j", "failed", error="boom")
+    record = jobs.get("j")
+    assert record["stage"] is None
+    assert record["stages"]["drafts"]["ended_at"] == record["finished_at"]
+
+
+def test_track_stage_ends_the_stage_on_error():
+    class Job:
+        def __init__(self):
+            self.calls = []
+
+        def start_stage(self, stage):
+            self.calls.append(("start", stage))
+
+        def end_stage(self, stage):
+            self.calls.append(("end", stage))
+
+    job = Job()
+    try:
+        with track_stage(job, "debate"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert job.calls == [("start", "debate"), ("end", "debate")]
+    with track_stage(None, "debate"):
+        pass
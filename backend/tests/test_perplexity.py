@@ -0,0 +1,42 @@
+import httpx
+import pytest
+
+from agent.llm_cache import MemoryCache
+from agent.perplexity import PerplexityClient
+from agent.ratelimit import LocalBucket, RateLimiter
+
+
+def reply(content):
+    return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.fixture
+def client():
+    cache = MemoryCache(ttl=60, max_entries=10)
+    client = PerplexityClient(api_key="test", limiter=RateLimiter(LocalBucket(100, 100), 1, 100),
+                              response_cache=cache)
+    client.requests = []
+
+    def handler(request):
+        client.requests.append(request)
+        return httpx.Response(200, json=reply(f"answer {len(client.requests)}"))
+
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    yield client
+    client.close()
+
+
+def test_identical_call_is_served_from_cache(client):
+    assert client.chat("p") == "answer 1"
+    assert client.chat("p") == "answer 1"
+    assert len(client.requests) == 1
+    assert client.cache.stats() == {"backend": "MemoryCache", "hits": 1, "misses": 1, "entries": 1}
+
+
+def test_use_cache_false_skips_the_lookup(client):
+    client.chat("p")
+    assert client.chat("p", use_cache=False) == "answer 2"
+    assert len(client.requests) == 2
+    assert client.cache.hits == 0
+    # the fresh reply replaces the cached one
+    assert client.chat("p") == "answer 2"
@@ -0,0 +1,19 @@
+import time
+
+from agent.ratelimit import LocalBucket, RateLimiter
+
+
+def test_pause_does_not_bank_tokens():
+    bucket = LocalBucket(rate=10.0, burst=5)
+    bucket.pause(0.3)
+    assert bucket.reserve() > 0
+    time.sleep(0.35)
+    # no burst straight after the pause: only what accrued since it ended
+    waits = [bucket.reserve() for _ in range(3)]
+    assert waits[0] > 0 and all(w > 0 for w in waits)
+
+
+def test_retry_after_pause_is_capped():
+    bucket = LocalBucket(rate=10.0, burst=5)
+    RateLimiter(bucket, 1.0, 10.0, max_pause=0.2).pause(3600)
+    assert 0 < bucket.reserve() <= 0.2
@@ -0,0 +1,66 @@
+import random
+import re
+
+import pytest
+
+from agent.transcript import TranscriptParser, iter_turns
+
+
+def regex_parse(transcript: str):
+    """The original generator.parse_transcript, kept as the oracle for the incremental parser."""
+    pattern = r'\[(S\d+)\]:?\s*(.*?)((?=\[S\d+\])|$)'
+    matches = re.findall(pattern, transcript, re.DOTALL)
+
+    cleaned = []
+    for speaker, content, _ in matches:
+        content = content.strip()
+        content = content.replace("*", "")
+        content = re.sub(r'\[\d+\]', '', content)
+        cleaned.append((speaker, content.strip()))
+    return cleaned
+
+
+# fragments chosen to hit tags, near-tags, citations and colons at every position
+TOKENS = [
+    "[S1]", "[S2]", "[S12]", "[S1]:", "[S2] :", "[S", "[", "S1]", "]", "[S]", "[s1]", "[S1x]",
+    "[1]", "[23]", "[a]", ":", "*", "**", " ", "  ", "\n", "\t", "Hello", "world.", "x", "1", "—", "é",
+]
+
+
+def random_transcript(rng: random.Random) -> str:
+    return "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 40)))
+
+
+def random_chunks(rng: random.Random, text: str) -> list:
+    cuts = sorted(rng.sample(range(len(text) + 1), k=min(len(text) + 1, rng.randint(0, 8))))
+    bounds = [0, *cuts, len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def parse_chunked(chunks) -> list:
+    parser = TranscriptParser()
+    turns = []
+    for chunk in chunks:
+        turns.extend(parser.feed(chunk))
+    turns.extend(parser.close())
+    return turns
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "no tags at all",
+    "Intro [S1]: Hello *there* [1] [S2] Hi [23]!\n[S1]Bye",
+    "[S1][S2][S1]",
+    "[S1]: a [S b [S2]: c [",
+])
+def test_matches_regex_on_examples(text):
+    assert parse_chunked([text]) == regex_parse(text)
+    assert list(iter_turns(text)) == regex_parse(text)  # one character per chunk
+
+
+def test_matches_regex_on_random_chunkings():
+    rng = random.Random(20240518)
+    for _ in range(30_000):
+        text = random_transcript(rng)
+        chunks = random_chunks(rng, text)
+        assert parse_chunked(chunks) == regex_parse(text), chunks
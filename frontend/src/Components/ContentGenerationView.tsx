@@ -106,10 +106,15 @@ export const ContentGenerationView: React.FC<ContentGenerationViewProps> = ({
   const [responses, setResponses] = useState<{ general_public?: string; critic?: string }>({});
   const [script, setScript] = useState<string>('');
   const [audioSrc, setAudioSrc] = useState<string>('');
+  // turns that are already synthesized, playable while the rest is generated
+  const [segments, setSegments] = useState<string[]>([]);
+  const [segmentIndex, setSegmentIndex] = useState(0);
+  const [segmentWaiting, setSegmentWaiting] = useState(false);
+  const segmentRef = useRef<HTMLAudioElement>(null);
 
 
   // manual SSE hookup
-  usePodcastSSE({ setStage, setResponses, setScript, setAudioSrc });
+  usePodcastSSE({ jobId, setStage, setResponses, setScript, setAudioSrc, setSegments });
 
   const [isShareDialogOpen, setIsShareDialogOpen] = useState(false);
 
@@ -157,11 +162,17 @@ const handleNextSubmit = () => {
     setResponses({});
     setScript("");
     setAudioSrc("");
+    setSegments([]);
+    setSegmentIndex(0);
+    setSegmentWaiting(false);
     fetch("/api/generate", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ query: nextPrompt }),
-    }).catch(console.error);
+    })
+      .then(res => res.json())
+      .then(data => setJobId(data.jobId))
+      .catch(console.error);
     setNextPrompt("");
   }
 };
@@ -208,6 +219,19 @@ const handleNextSubmit = () => {
     setIsLoading(true);
   }, [audioSrc]);
   
+  // the preview player ran out of segments: carry on as soon as the next one lands
+  useEffect(() => {
+    if (segmentWaiting && segments[segmentIndex]) {
+      setSegmentWaiting(false);
+      segmentRef.current?.play().catch(console.error);
+    }
+  }, [segments, segmentIndex, segmentWaiting]);
+
+  const onSegmentEnded = () => {
+    setSegmentIndex(i => i + 1);
+    setSegmentWaiting(true);
+  };
+
   // toggle play/pause
   useEffect(() => {
     if (!audioRef.current) return;
@@ -446,6 +470,22 @@ const handleNextSubmit = () => {
               </div>
             )}
 
+          {/* Preview of the turns synthesized so far */}
+          {stage !== 'audioReady' && segments[0] && (
+            <div className="bg-[#2E2D2D] rounded-xl py-3 px-6 mb-6">
+              <span className="text-[#A1A1A1] text-sm">
+                Listen while the rest is generated ({segments.filter(Boolean).length} parts ready)
+              </span>
+              <audio
+                ref={segmentRef}
+                src={segments[Math.min(segmentIndex, segments.length - 1)]}
+                onEnded={onSegmentEnded}
+                controls
+                className="w-full mt-2"
+              />
+            </div>
+          )}
+
           {/* Audio Player */}
           {stage === 'audioReady' && audioSrc && (
             <>
@@ -13,25 +13,48 @@ export type Stage =
   | 'audioReady'
 
 interface UsePodcastSSEArgs {
+  jobId?: string
   setStage: React.Dispatch<React.SetStateAction<Stage>>
   setResponses: React.Dispatch<
     React.SetStateAction<{ general_public?: string; critic?: string }>
   >
   setScript: React.Dispatch<React.SetStateAction<string>>
   setAudioSrc: React.Dispatch<React.SetStateAction<string>>
+  setSegments?: React.Dispatch<React.SetStateAction<string[]>>
 }
 
 export function usePodcastSSE({
+  jobId,
   setStage,
   setResponses,
   setScript,
   setAudioSrc,
+  setSegments,
 }: UsePodcastSSEArgs) {
   useEffect(() => {
-    console.log('📡 [SSE] mounting…')
-    const es = new EventSource(SSE_URL)
+    // each job publishes on its own channel; nothing to listen to until we have one
+    if (!jobId) return
+    console.log('📡 [SSE] mounting…', jobId)
+    const es = new EventSource(`${SSE_URL}?channel=${encodeURIComponent(jobId)}`)
 
-    es.onopen = () => console.log('✅ SSE connection opened')
+    es.onopen = () => {
+      console.log('✅ SSE connection opened')
+      // events published before we (re)connected are gone; catch up from the job record
+      fetch(`/api/jobs/${jobId}`)
+        .then((res) => (res.ok ? res.json() : null))
+        .then((job) => {
+          if (job?.drafts?.Sarah) setResponses((r) => ({ ...r, general_public: job.drafts.Sarah }))
+          if (job?.drafts?.John) setResponses((r) => ({ ...r, critic: job.drafts.John }))
+          if (job?.script) setScript(job.script)
+          if (job?.artifacts?.audio) {
+            setAudioSrc(`http://localhost:5000${job.artifacts.audio}`)
+            setStage('audioReady')
+          } else if (job?.state === 'running') {
+            setStage((s) => (s === 'crawling' ? 'initialResponses' : s))
+          }
+        })
+        .catch(console.error)
+    }
     es.onerror = (err) =>
       console.error('❌ SSE error (readyState=' + es.readyState + ')', err)
 
@@ -74,6 +97,21 @@ export function usePodcastSSE({
       }
     })
 
+    // partial drafts while the persona is still writing
+    es.addEventListener('persona_delta', (e) => {
+      const { persona, delta } = JSON.parse(e.data)
+      const key = persona === 'Sarah' ? 'general_public' : persona === 'John' ? 'critic' : undefined
+      if (key) {
+        setResponses((r) => ({ ...r, [key]: (r[key] ?? '') + delta }))
+      }
+    })
+
+    // partial final script; replaced by the formatted 'script' event
+    es.addEventListener('script_delta', (e) => {
+      const { delta } = JSON.parse(e.data)
+      setScript((s) => s + delta)
+    })
+
     es.addEventListener('script', (e) => {
       const { script: incoming } = JSON.parse(e.data)
       console.log('[SSE script]', incoming)
@@ -83,6 +121,16 @@ export function usePodcastSSE({
       }
     })
 
+    // each synthesized turn is playable before the whole episode is done
+    es.addEventListener('segment', (e) => {
+      const { index, url } = JSON.parse(e.data)
+      setSegments?.((segs) => {
+        const next = [...segs]
+        next[index] = `http://localhost:5000${url}`
+        return next
+      })
+    })
+
     es.addEventListener('audio', (e) => {
       console.log('[SSE audio]', e.data)
       const { audio } = JSON.parse(e.data)
@@ -95,5 +143,5 @@ export function usePodcastSSE({
       console.log('📴 [SSE] unmounting')
       es.close()
     }
-  }, [setStage, setResponses, setScript, setAudioSrc])
+  }, [jobId, setStage, setResponses, setScript, setAudioSrc, setSegments])
 }
\ No newline at end of file